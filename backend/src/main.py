@@ -21,6 +21,12 @@ from src.routes.projects import projects_bp
 from src.routes.actors import actors_bp
 from src.routes.videos import videos_bp
 from src.routes.voices import voices_bp   # NEW
+from src.routes.video_jobs import video_job_queue
+from src.routes.status_poller import status_poller
+from src.routes.voices import voice_catalog, tts_job_queue, voice_clone_queue
+from src.routes.analytics_buffer import analytics_buffer
+from src.routes.metrics_rollup import metrics_rollup
+from src.models.schema import upgrade_schema
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -50,12 +56,28 @@ db.init_app(app)
 from src.models.project import Project
 from src.models.video import GeneratedVideo
 from src.models.actor import AIActor
-from src.models.voice import VoiceClone, VoiceLibrary
+from src.models.voice import VoiceClone, VoiceLibrary, VoiceGenerationJob
 from src.models.subscription import SubscriptionPlan, Payment, UsageLog
 from src.models.content import Template, Asset, UserFavorite, Collection, CollectionItem
 
 with app.app_context():
     db.create_all()
+    upgrade_schema()
+
+# Background workers that submit queued videos to Pollo AI and follow their progress
+status_poller.init_app(app)
+video_job_queue.init_app(app)
+
+# Keeps VoiceLibrary in sync with the ElevenLabs catalog
+voice_catalog.init_app(app)
+# Background speech synthesis for async voice generation requests
+tts_job_queue.init_app(app)
+voice_clone_queue.init_app(app)
+
+# Writes tracked analytics events in the background, in bulk
+analytics_buffer.init_app(app)
+# Folds new rows into DailyMetrics for the admin dashboard
+metrics_rollup.init_app(app)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -24,7 +24,8 @@ class AnalyticsEvent(db.Model):
     country = db.Column(db.String(100))
     
     # Timestamps
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # When it happened (client clock, may be back-dated)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # When it was stored; the metrics rollup follows this
     
     def __repr__(self):
         return f'<AnalyticsEvent {self.event_type} by {self.user_id}>'
@@ -62,6 +63,7 @@ class DailyMetrics(db.Model):
     videos_generated = db.Column(db.Integer, default=0)
     total_credits_used = db.Column(db.Integer, default=0)
     avg_video_duration = db.Column(db.Float, default=0.0)
+    timed_videos = db.Column(db.Integer, default=0, server_default='0')  # Videos with a duration, the weight of avg_video_duration
     
     # Template usage
     templates_used = db.Column(db.Integer, default=0)
@@ -112,6 +114,32 @@ class DailyMetrics(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class DailyActiveUser(db.Model):
+    """Users already counted in a day's DailyMetrics.active_users, so later rollups do not count them again"""
+    date = db.Column(db.Date, primary_key=True)
+    user_id = db.Column(db.String(36), primary_key=True)
+
+    def __repr__(self):
+        return f'<DailyActiveUser {self.user_id} on {self.date}>'
+
+class MetricsRollupState(db.Model):
+    """High-water mark of the DailyMetrics rollup for one source table"""
+    source = db.Column(db.String(50), primary_key=True)  # 'users', 'videos', 'events', 'payments'
+    high_water_mark = db.Column(db.DateTime, nullable=True)  # Rows before this are folded in; None until the first run
+    rows_folded = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<MetricsRollupState {self.source} @ {self.high_water_mark}>'
+
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'high_water_mark': self.high_water_mark.isoformat() if self.high_water_mark else None,
+            'rows_folded': self.rows_folded,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
 class UserSession(db.Model):
     """Track user sessions for analytics"""
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -0,0 +1,38 @@
+from sqlalchemy import inspect, literal, text
+from src.models.user import db
+
+def upgrade_schema():
+    """
+    Bring an existing SQLite database up to date with the models.
+
+    ``db.create_all()`` only creates missing tables, so columns and indexes
+    added to existing models would otherwise never reach an older app.db.
+    New columns must be nullable or have a ``server_default``, which
+    existing rows then take.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing_columns = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    if isinstance(default, str):
+                        default = literal(default)
+                    ddl += ' DEFAULT ' + str(default.compile(dialect=db.engine.dialect,
+                                                              compile_kwargs={'literal_binds': True}))
+                conn.execute(text(ddl))
+
+            existing_indexes = {i['name'] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=conn, checkfirst=True)
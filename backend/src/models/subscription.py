@@ -55,7 +55,7 @@ class Payment(db.Model):
     credits_purchased = db.Column(db.Integer, default=0)
     description = db.Column(db.String(255))
     payment_metadata = db.Column(db.JSON, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships will be handled by foreign keys
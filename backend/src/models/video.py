@@ -16,13 +16,19 @@ class GeneratedVideo(db.Model):
     resolution = db.Column(db.String(20))
     file_size_bytes = db.Column(db.BigInteger)
     generation_status = db.Column(db.String(50), default='pending')
+    progress = db.Column(db.Integer, default=0)  # 0-100, kept current by the status poller
     generation_started_at = db.Column(db.DateTime)
-    generation_completed_at = db.Column(db.DateTime)
+    generation_completed_at = db.Column(db.DateTime, index=True)  # Set once, on reaching a terminal status
     ai_service_used = db.Column(db.String(100))
     quality_score = db.Column(db.Numeric(3, 2))
     credits_used = db.Column(db.Integer, default=0)
-    pollo_task_id = db.Column(db.String(255))  # Pollo AI task ID for tracking
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    pollo_task_id = db.Column(db.String(255), index=True)  # Pollo AI task ID for tracking and webhook lookups
+    bulk_job_id = db.Column(db.String(36), index=True)  # Groups variations from one bulk request
+    request_fingerprint = db.Column(db.String(64), index=True)  # Hash of the inputs, used to deduplicate resubmits
+    generation_params = db.Column(db.JSON)  # Script and settings the job queue submits to Pollo AI
+    submission_claimed_at = db.Column(db.DateTime)  # Lease on a 'submitting' row; only expired claims are retried
+    error_message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     # Relationships
     project = db.relationship('Project', backref=db.backref('videos', lazy=True))
@@ -45,12 +51,16 @@ class GeneratedVideo(db.Model):
             'resolution': self.resolution,
             'file_size_bytes': self.file_size_bytes,
             'generation_status': self.generation_status,
+            'progress': self.progress,
             'generation_started_at': self.generation_started_at.isoformat() if self.generation_started_at else None,
             'generation_completed_at': self.generation_completed_at.isoformat() if self.generation_completed_at else None,
             'ai_service_used': self.ai_service_used,
             'quality_score': float(self.quality_score) if self.quality_score else None,
             'credits_used': self.credits_used,
             'pollo_task_id': self.pollo_task_id,
+            'bulk_job_id': self.bulk_job_id,
+            'generation_params': self.generation_params,
+            'error_message': self.error_message,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
@@ -17,7 +17,13 @@ class VoiceClone(db.Model):
     quality_score = db.Column(db.Numeric(3, 2))
     is_public = db.Column(db.Boolean, default=False)
     usage_count = db.Column(db.Integer, default=0)
+    # Clones made before this column existed were created synchronously, so they default to 'ready'
+    status = db.Column(db.String(20), default='ready', server_default='ready', index=True)  # pending, uploading, ready, failed
+    sample_files = db.Column(db.JSON)  # Spooled uploads awaiting the background clone job
+    upload_claimed_at = db.Column(db.DateTime)  # Lease on an 'uploading' row; only expired claims are retried
+    error_message = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
 
     # Relationship to user
     user = db.relationship('User', backref=db.backref('voice_clones', lazy=True))
@@ -40,7 +46,10 @@ class VoiceClone(db.Model):
             'quality_score': float(self.quality_score) if self.quality_score else None,
             'is_public': self.is_public,
             'usage_count': self.usage_count,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'status': self.status,
+            'error_message': self.error_message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
         }
 
 class VoiceLibrary(db.Model):
@@ -51,12 +60,14 @@ class VoiceLibrary(db.Model):
     accent = db.Column(db.String(50))
     gender = db.Column(db.String(20))
     style = db.Column(db.String(100))
+    age_range = db.Column(db.String(20))
     preview_audio_url = db.Column(db.String(500))
     ai_service = db.Column(db.String(100))
     quality_score = db.Column(db.Numeric(3, 2))
     usage_count = db.Column(db.Integer, default=0)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    synced_at = db.Column(db.DateTime)  # Last time the provider catalog listed this voice
 
     def __repr__(self):
         return f'<VoiceLibrary {self.name}>'
@@ -70,11 +81,47 @@ class VoiceLibrary(db.Model):
             'accent': self.accent,
             'gender': self.gender,
             'style': self.style,
+            'age_range': self.age_range,
             'preview_audio_url': self.preview_audio_url,
             'ai_service': self.ai_service,
             'quality_score': float(self.quality_score) if self.quality_score else None,
             'usage_count': self.usage_count,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'synced_at': self.synced_at.isoformat() if self.synced_at else None
         }
 
+
+class VoiceGenerationJob(db.Model):
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=True, index=True)  # Only the owner can follow the job
+    voice_id = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), default='queued', index=True)  # queued, processing, completed, failed
+    params = db.Column(db.JSON)  # Request body the worker synthesizes
+    segments_total = db.Column(db.Integer)
+    segments_completed = db.Column(db.Integer, default=0)
+    audio_url = db.Column(db.String(500))
+    cached = db.Column(db.Boolean)
+    error_message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    claimed_at = db.Column(db.DateTime)  # Lease on a 'processing' row, renewed per segment; only expired claims are retried
+    completed_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<VoiceGenerationJob {self.id}>'
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'voice_id': self.voice_id,
+            'status': self.status,
+            'segments_total': self.segments_total,
+            'segments_completed': self.segments_completed,
+            'audio_url': self.audio_url,
+            'cached': self.cached,
+            'error_message': self.error_message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
@@ -1,7 +1,11 @@
 from flask import Blueprint, request, jsonify
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta, date, timezone
 from sqlalchemy import func, and_, or_
 import json
+import os
+import uuid
+from functools import lru_cache
+from typing import NamedTuple
 
 from ..models.user import User, db
 from ..models.analytics import AnalyticsEvent, DailyMetrics, UserSession, RevenueMetrics
@@ -9,6 +13,8 @@ from ..models.subscription import Payment, SubscriptionPlan
 from ..models.video import GeneratedVideo
 from ..models.content import Template
 from ..routes.auth_enhanced import verify_jwt_token, log_user_action
+from .analytics_buffer import analytics_buffer
+from .metrics_rollup import metrics_rollup
 
 analytics_bp = Blueprint('analytics', __name__)
 
@@ -33,63 +39,219 @@ def require_admin():
         return False
     return True
 
+# Upper bound on events per /track/batch request
+MAX_BATCH_EVENTS = int(os.environ.get('ANALYTICS_MAX_BATCH_EVENTS', 100))
+# Buffered events arrive late; client timestamps older than this are clamped
+MAX_EVENT_AGE = timedelta(hours=24)
+
+def request_event_context():
+    """Columns shared by every event in a request, derived once per request"""
+    user = get_authenticated_user()
+    user_agent = request.headers.get('User-Agent', '')
+    device_type, browser, os_name = classify_user_agent(user_agent)
+    return {
+        'user_id': user.id if user else None,
+        'ip_address': request.remote_addr,
+        'user_agent': user_agent[:500],
+        'device_type': device_type,
+        'browser': browser,
+        'os': os_name
+    }
+
+def parse_client_timestamp(value, now):
+    """When the event happened on the client (ISO 8601 or epoch ms), clamped to [now - MAX_EVENT_AGE, now]"""
+    if value is None:
+        return now
+    if isinstance(value, (int, float)):
+        occurred_at = datetime.fromtimestamp(value / 1000, timezone.utc)
+    else:
+        occurred_at = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if occurred_at.tzinfo:
+        occurred_at = occurred_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(max(occurred_at, now - MAX_EVENT_AGE), now)
+
+def build_event_row(data, context, now):
+    """AnalyticsEvent column values for one tracked event; raises ValueError if it is invalid"""
+    if not isinstance(data, dict):
+        raise ValueError('event must be an object')
+    event_type = data.get('event_type')
+    if not event_type or not isinstance(event_type, str):
+        raise ValueError('event_type is required')
+
+    event_id = data.get('event_id')
+    if event_id is not None:
+        try:
+            event_id = str(uuid.UUID(str(event_id)))
+        except ValueError:
+            raise ValueError('event_id must be a UUID')
+
+    try:
+        created_at = parse_client_timestamp(data.get('timestamp'), now)
+    except (TypeError, ValueError, OverflowError, OSError):
+        raise ValueError('timestamp must be ISO 8601 or epoch milliseconds')
+
+    return {
+        **context,
+        'id': event_id or str(uuid.uuid4()),
+        'session_id': data.get('session_id'),
+        'event_type': event_type[:100],
+        'event_category': data.get('event_category') or 'user_action',
+        'event_data': data.get('event_data', {}),
+        'page_url': (data.get('page_url') or '')[:500] or None,
+        'referrer': (data.get('referrer') or '')[:500] or None,
+        'created_at': created_at
+    }
+
+def buffer_full_response():
+    """503 telling the client to hold on to its events and retry shortly"""
+    response = jsonify({
+        'success': False,
+        'message': 'Analytics ingestion is busy, retry later'
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @analytics_bp.route('/track', methods=['POST'])
 def track_event():
-    """Track analytics event"""
+    """Track analytics event (queued for the background writer, see analytics_buffer)"""
     try:
         data = request.get_json()
-        
-        # Extract event data
-        event_type = data.get('event_type')
-        event_category = data.get('event_category', 'user_action')
-        event_data = data.get('event_data', {})
-        
-        if not event_type:
+
+        try:
+            row = build_event_row(data, request_event_context(), datetime.utcnow())
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'message': 'event_type is required'
+                'message': str(e)
             }), 400
-        
-        # Get user if authenticated
-        user = get_authenticated_user()
-        user_id = user.id if user else None
-        
-        # Extract request context
-        session_id = data.get('session_id')
-        page_url = data.get('page_url')
-        referrer = data.get('referrer')
-        
-        # Create analytics event
-        event = AnalyticsEvent(
-            user_id=user_id,
-            session_id=session_id,
-            event_type=event_type,
-            event_category=event_category,
-            event_data=event_data,
-            page_url=page_url,
-            referrer=referrer,
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent', ''),
-            device_type=detect_device_type(request.headers.get('User-Agent', '')),
-            browser=detect_browser(request.headers.get('User-Agent', '')),
-            os=detect_os(request.headers.get('User-Agent', ''))
-        )
-        
-        db.session.add(event)
-        db.session.commit()
+
+        if not analytics_buffer.offer([row]):
+            return buffer_full_response()
         
         return jsonify({
             'success': True,
             'message': 'Event tracked successfully'
-        }), 201
+        }), 202
         
     except Exception as e:
-        db.session.rollback()
         return jsonify({
             'success': False,
             'message': f'Failed to track event: {str(e)}'
         }), 500
 
+@analytics_bp.route('/track/batch', methods=['POST'])
+def track_event_batch():
+    """
+    Track a batch of analytics events, queued as a unit for the background
+    writer's bulk inserts.
+
+    Body: ``{"events": [...]}`` with up to MAX_BATCH_EVENTS events, each
+    shaped like the /track body plus two optional fields that clients
+    buffering events should send:
+
+    - ``event_id``: a client-generated UUID. Events whose ID is already
+      stored are skipped, so retrying a batch after a network error does
+      not double count.
+    - ``timestamp``: when the event happened (ISO 8601 or epoch ms),
+      since a buffered event reaches us later. Clamped to the last 24h.
+
+    Invalid events are rejected individually and listed by index in the
+    response; clients should drop those rather than retry them. A 503
+    means the buffer is full and nothing was queued: retry the whole batch
+    after Retry-After.
+    """
+    try:
+        data = request.get_json(silent=True)
+        events = data.get('events') if isinstance(data, dict) else data
+        if not isinstance(events, list) or not events:
+            return jsonify({
+                'success': False,
+                'message': 'events must be a non-empty array'
+            }), 400
+        if len(events) > MAX_BATCH_EVENTS:
+            return jsonify({
+                'success': False,
+                'message': f'At most {MAX_BATCH_EVENTS} events per batch'
+            }), 413
+
+        context = request_event_context()
+        now = datetime.utcnow()
+        rows = {}
+        rejected = []
+        for index, event in enumerate(events):
+            try:
+                row = build_event_row(event, context, now)
+            except ValueError as e:
+                rejected.append({'index': index, 'message': str(e)})
+                continue
+            rows.setdefault(row['id'], row)  # Duplicates within the batch count once
+
+        # Events already stored by an earlier attempt are skipped when the buffer is written
+        if rows and not analytics_buffer.offer(list(rows.values())):
+            return buffer_full_response()
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'accepted': len(rows),
+                'duplicates': len(events) - len(rejected) - len(rows),
+                'rejected': rejected
+            }
+        }), 202
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Failed to track events: {str(e)}'
+        }), 500
+
+@analytics_bp.route('/ingestion', methods=['GET'])
+def get_ingestion_stats():
+    """Analytics write-behind buffer counters - ADMIN ONLY"""
+    user = get_authenticated_user()
+    if not user or not user.is_admin():
+        return jsonify({
+            'success': False,
+            'message': 'Admin access required'
+        }), 403
+    return jsonify({'success': True, 'data': analytics_buffer.stats()})
+
+@analytics_bp.route('/rollup', methods=['POST'])
+def run_metrics_rollup():
+    """Fold rows stored since the last rollup into DailyMetrics now - ADMIN ONLY"""
+    user = get_authenticated_user()
+    if not user or not user.is_admin():
+        return jsonify({
+            'success': False,
+            'message': 'Admin access required'
+        }), 403
+    try:
+        folded = metrics_rollup.run()
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Metrics rollup failed: {str(e)}'
+        }), 500
+    return jsonify({'success': True, 'data': {'folded': folded, **metrics_rollup.state()}})
+
+@analytics_bp.route('/rollup/reset', methods=['POST'])
+def reset_metrics_rollup():
+    """Discard all DailyMetrics days and rebuild them from the raw tables - ADMIN ONLY"""
+    user = get_authenticated_user()
+    if not user or not user.is_admin():
+        return jsonify({
+            'success': False,
+            'message': 'Admin access required'
+        }), 403
+    try:
+        folded = metrics_rollup.reset()
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Metrics rollup reset failed: {str(e)}'
+        }), 500
+    return jsonify({'success': True, 'data': {'folded': folded, **metrics_rollup.state()}})
+
 @analytics_bp.route('/dashboard', methods=['GET'])
 def get_dashboard_data():
     """Get analytics dashboard data - ADMIN ONLY"""
@@ -104,29 +266,24 @@ def get_dashboard_data():
         
         # Get date range
         days = int(request.args.get('days', 30))
-        end_date = date.today()
+        end_date = datetime.utcnow().date()  # DailyMetrics days are UTC
         start_date = end_date - timedelta(days=days)
         
-        # Get daily metrics
+        # Only precomputed rows are read here; MetricsRollup keeps them current
         daily_metrics = DailyMetrics.query.filter(
             and_(DailyMetrics.date >= start_date, DailyMetrics.date <= end_date)
         ).order_by(DailyMetrics.date.asc()).all()
         
-        # If no metrics exist, generate sample data
-        if not daily_metrics:
-            daily_metrics = generate_sample_daily_metrics(start_date, end_date)
-        
         # Calculate totals and trends
-        total_users = User.query.count()
-        total_videos = GeneratedVideo.query.count()
-        total_revenue = db.session.query(func.sum(Payment.amount)).filter(
-            Payment.status == 'succeeded'
-        ).scalar() or 0
-        
-        # Recent activity
-        recent_events = AnalyticsEvent.query.filter(
-            AnalyticsEvent.created_at >= datetime.utcnow() - timedelta(hours=24)
-        ).order_by(AnalyticsEvent.created_at.desc()).limit(50).all()
+        total_users, total_videos, total_revenue = db.session.query(
+            func.coalesce(func.sum(DailyMetrics.new_users), 0),
+            func.coalesce(func.sum(DailyMetrics.videos_generated), 0),
+            func.coalesce(func.sum(DailyMetrics.revenue), 0.0)
+        ).one()
+        users_before = db.session.query(
+            func.coalesce(func.sum(DailyMetrics.new_users), 0)
+        ).filter(DailyMetrics.date < start_date).scalar()
+        today = daily_metrics[-1] if daily_metrics and daily_metrics[-1].date == end_date else None
         
         # Top templates
         top_templates = db.session.query(
@@ -138,12 +295,14 @@ def get_dashboard_data():
         
         # User growth
         user_growth = []
+        running_total = users_before
         for metric in daily_metrics:
+            running_total += metric.new_users
             user_growth.append({
                 'date': metric.date.isoformat(),
                 'new_users': metric.new_users,
                 'active_users': metric.active_users,
-                'total_users': metric.new_users  # Simplified for demo
+                'total_users': running_total
             })
         
         # Revenue trend
@@ -173,13 +332,13 @@ def get_dashboard_data():
                     'total_users': total_users,
                     'total_videos': total_videos,
                     'total_revenue': total_revenue,
-                    'active_sessions': len(recent_events)
+                    'active_sessions': today.active_users if today else 0
                 },
                 'user_growth': user_growth,
                 'revenue_trend': revenue_trend,
                 'video_trend': video_trend,
                 'top_templates': [{'name': name, 'usage': count} for name, count in top_templates],
-                'recent_activity': [event.to_dict() for event in recent_events[:10]]
+                'metrics_rollup': metrics_rollup.state()
             }
         }), 200
         
@@ -382,89 +541,54 @@ def get_content_analytics():
             'message': f'Failed to get content analytics: {str(e)}'
         }), 500
 
-def generate_sample_daily_metrics(start_date, end_date):
-    """Generate sample daily metrics for demo purposes"""
-    import random
-    
-    metrics = []
-    current_date = start_date
-    
-    while current_date <= end_date:
-        # Generate realistic sample data
-        base_users = 50 + (current_date - start_date).days * 2
-        
-        metric = DailyMetrics(
-            date=current_date,
-            new_users=random.randint(5, 25),
-            active_users=base_users + random.randint(-10, 20),
-            returning_users=random.randint(20, 40),
-            videos_generated=random.randint(100, 500),
-            total_credits_used=random.randint(200, 1000),
-            avg_video_duration=random.uniform(10, 30),
-            templates_used=random.randint(50, 200),
-            revenue=random.uniform(500, 2000),
-            new_subscriptions=random.randint(2, 15),
-            cancelled_subscriptions=random.randint(0, 5),
-            credits_purchased=random.randint(100, 500),
-            avg_session_duration=random.uniform(5, 25),
-            bounce_rate=random.uniform(20, 60),
-            page_views=random.randint(500, 2000),
-            model_usage={
-                'kling': random.randint(30, 50),
-                'runway': random.randint(20, 40),
-                'veo2': random.randint(15, 35),
-                'luma': random.randint(10, 25)
-            }
-        )
-        
-        db.session.add(metric)
-        metrics.append(metric)
-        current_date += timedelta(days=1)
-    
-    try:
-        db.session.commit()
-    except:
-        db.session.rollback()
-    
-    return metrics
-
-def detect_device_type(user_agent):
-    """Detect device type from user agent"""
-    user_agent = user_agent.lower()
-    if 'mobile' in user_agent or 'android' in user_agent or 'iphone' in user_agent:
-        return 'mobile'
-    elif 'tablet' in user_agent or 'ipad' in user_agent:
-        return 'tablet'
-    else:
-        return 'desktop'
-
-def detect_browser(user_agent):
-    """Detect browser from user agent"""
-    user_agent = user_agent.lower()
-    if 'chrome' in user_agent:
-        return 'Chrome'
-    elif 'firefox' in user_agent:
-        return 'Firefox'
-    elif 'safari' in user_agent:
-        return 'Safari'
-    elif 'edge' in user_agent:
-        return 'Edge'
-    else:
-        return 'Other'
-
-def detect_os(user_agent):
-    """Detect operating system from user agent"""
-    user_agent = user_agent.lower()
-    if 'windows' in user_agent:
-        return 'Windows'
-    elif 'mac' in user_agent:
-        return 'macOS'
-    elif 'linux' in user_agent:
-        return 'Linux'
-    elif 'android' in user_agent:
-        return 'Android'
-    elif 'ios' in user_agent:
-        return 'iOS'
+class UserAgentInfo(NamedTuple):
+    device_type: str
+    browser: str
+    os: str
+
+# First match wins, so more specific tokens come first: Edge and Opera also
+# send "Chrome/", Chrome sends "Safari/", iOS sends "like Mac OS X" and
+# Android sends "Linux"
+_BROWSER_TOKENS = (
+    (('edg/', 'edge/', 'edga/', 'edgios/'), 'Edge'),
+    (('opr/', 'opera'), 'Opera'),
+    (('samsungbrowser/',), 'Samsung Internet'),
+    (('firefox/', 'fxios/'), 'Firefox'),
+    (('chrome/', 'crios/', 'chromium/'), 'Chrome'),
+    (('safari/',), 'Safari'),
+    (('msie ', 'trident/'), 'Internet Explorer'),
+)
+_OS_TOKENS = (
+    (('iphone', 'ipad', 'ipod'), 'iOS'),
+    (('android',), 'Android'),
+    (('windows',), 'Windows'),
+    (('cros ',), 'Chrome OS'),  # "CrOS x86_64"; bare 'cros' would match 'microsoft'
+    (('mac os x', 'macintosh'), 'macOS'),
+    (('linux',), 'Linux'),
+)
+
+def _first_match(user_agent, table):
+    for tokens, name in table:
+        if any(token in user_agent for token in tokens):
+            return name
+    return 'Other'
+
+@lru_cache(maxsize=1024)
+def classify_user_agent(user_agent):
+    """
+    Device type, browser and OS from a User-Agent header, in one pass over
+    the lowercased string. Memoized: a few hundred distinct UA strings make
+    up nearly all traffic.
+    """
+    ua = (user_agent or '').lower()
+
+    # Tablets first: iPads send "Mobile/..." too; Android tablets omit "Mobile"
+    if 'ipad' in ua or 'tablet' in ua or 'kindle' in ua or 'silk/' in ua or \
+            ('android' in ua and 'mobile' not in ua):
+        device_type = 'tablet'
+    elif 'mobi' in ua or 'iphone' in ua or 'ipod' in ua or 'android' in ua or 'windows phone' in ua:
+        device_type = 'mobile'
     else:
-        return 'Other'
+        device_type = 'desktop'
 
+    return UserAgentInfo(device_type, _first_match(ua, _BROWSER_TOKENS), _first_match(ua, _OS_TOKENS))
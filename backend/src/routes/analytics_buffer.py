@@ -0,0 +1,145 @@
+"""
+Analytics Write-Behind Buffer
+Tracked events are queued in memory and bulk-inserted by a background
+thread, so tracking never adds a commit to a user request or competes
+with video and payment writes for SQLite's writer lock on every event
+"""
+
+import atexit
+import os
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from src.models.user import db
+from src.models.analytics import AnalyticsEvent
+
+# A failing batch is retried this many times before its events are dropped
+MAX_FLUSH_ATTEMPTS = 3
+
+class AnalyticsBuffer:
+    """
+    Bounded in-process buffer of AnalyticsEvent rows.
+
+    The writer flushes every ``flush_interval_ms`` or as soon as
+    ``flush_events`` rows are waiting, one bulk insert and commit per
+    batch; rows whose ID is already stored (a client retry) are skipped.
+    When the buffer is full ``offer`` refuses the whole submission so the
+    endpoint can answer 503 and the client retry later; refused and
+    abandoned events are counted in ``stats``. Events still buffered when
+    the process exits are flushed on a best-effort basis.
+    """
+
+    def __init__(self, capacity: int = None, flush_events: int = None, flush_interval_ms: int = None):
+        self.capacity = capacity or int(os.environ.get('ANALYTICS_BUFFER_CAPACITY', 10000))
+        self.flush_events = flush_events or int(os.environ.get('ANALYTICS_FLUSH_EVENTS', 500))
+        self.flush_interval = (flush_interval_ms or int(os.environ.get('ANALYTICS_FLUSH_INTERVAL_MS', 1000))) / 1000
+        self.app = None
+        self.counters = Counter()
+        self.last_flush_at: Optional[datetime] = None
+        self._events = deque()  # (row, attempts)
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Bind the buffer to the Flask app; the writer starts with the first request"""
+        self.app = app
+        app.extensions['analytics_buffer'] = self
+        app.before_request(self.start)
+        atexit.register(self.flush)
+
+    def start(self):
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, name='analytics-writer', daemon=True)
+            self._thread.start()
+
+    def offer(self, rows: List[Dict[str, Any]]) -> bool:
+        """Queue AnalyticsEvent rows for insertion; False (nothing queued) if they do not fit"""
+        with self._cond:
+            if len(self._events) + len(rows) > self.capacity:
+                self.counters['dropped_full'] += len(rows)
+                return False
+            self._events.extend((row, 0) for row in rows)
+            self.counters['accepted'] += len(rows)
+            if len(self._events) >= self.flush_events:
+                self._cond.notify()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            buffered = len(self._events)
+        return {
+            'buffered': buffered,
+            'capacity': self.capacity,
+            'accepted': self.counters['accepted'],
+            'written': self.counters['written'],
+            'duplicates': self.counters['duplicates'],
+            'dropped_full': self.counters['dropped_full'],
+            'dropped_error': self.counters['dropped_error'],
+            'flushes': self.counters['flushes'],
+            'flush_errors': self.counters['flush_errors'],
+            'last_flush_at': self.last_flush_at.isoformat() if self.last_flush_at else None
+        }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._events) >= self.flush_events, timeout=self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write out everything buffered now, in batches of ``flush_events``"""
+        if not self.app:
+            return
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    batch = [self._events.popleft() for _ in range(min(self.flush_events, len(self._events)))]
+                if not batch:
+                    return
+                try:
+                    with self.app.app_context():
+                        self._write([row for row, _ in batch])
+                except Exception as e:
+                    self._requeue(batch)
+                    self.app.logger.error(f"Analytics flush of {len(batch)} events failed: {str(e)}")
+                    return  # Try again on the next interval
+
+    def _write(self, rows: List[Dict[str, Any]]):
+        unique = {row['id']: row for row in rows}
+        try:
+            existing = {
+                event_id for (event_id,) in db.session.query(AnalyticsEvent.id).filter(
+                    AnalyticsEvent.id.in_(list(unique))
+                )
+            }
+            new_rows = [row for event_id, row in unique.items() if event_id not in existing]
+            if new_rows:
+                db.session.execute(insert(AnalyticsEvent), new_rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self.counters['written'] += len(new_rows)
+        self.counters['duplicates'] += len(rows) - len(new_rows)
+        self.counters['flushes'] += 1
+        self.last_flush_at = datetime.utcnow()
+
+    def _requeue(self, batch):
+        self.counters['flush_errors'] += 1
+        retry = [(row, attempts + 1) for row, attempts in batch if attempts + 1 < MAX_FLUSH_ATTEMPTS]
+        with self._cond:
+            room = max(self.capacity - len(self._events), 0)
+            kept = retry[:room]
+            self._events.extendleft(reversed(kept))
+        self.counters['dropped_error'] += len(batch) - len(kept)
+
+# Global instance
+analytics_buffer = AnalyticsBuffer()
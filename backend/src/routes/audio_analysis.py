@@ -0,0 +1,217 @@
+"""
+MP3 Analysis
+Pure-Python MP3 frame-header parser fed as audio is written, giving the
+exact duration and a downsampled peak waveform without decoding samples
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+# Waveform points per second of audio, so tracks of any length share one timeline scale
+WAVEFORM_RESOLUTION = int(os.environ.get('TTS_WAVEFORM_RESOLUTION', 20))
+# Levels this far below the loudest frame are drawn as silence
+WAVEFORM_RANGE_DB = 48.0
+
+_BITRATES = {  # kbps, by (MPEG-1?, layer)
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+class _BitReader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def read(self, bits: int) -> int:
+        value = 0
+        for _ in range(bits):
+            byte = self.data[self.pos >> 3]
+            value = (value << 1) | ((byte >> (7 - (self.pos & 7))) & 1)
+            self.pos += 1
+        return value
+
+def parse_frame_header(header: bytes) -> Optional[Dict[str, Any]]:
+    """Decode a 4-byte MPEG audio frame header, or None if it is not one"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 3  # 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+    layer = 4 - ((header[1] >> 1) & 3)
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None  # Reserved values; free-format bitrate is not supported either
+
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (header[2] >> 1) & 1
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or mpeg1:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+
+    return {
+        'mpeg1': mpeg1,
+        'layer': layer,
+        'crc': not header[1] & 1,
+        'channels': 1 if header[3] >> 6 == 3 else 2,
+        'sample_rate': sample_rate,
+        'samples': samples,
+        'length': length
+    }
+
+def _frame_level(frame: bytes, info: Dict[str, Any]) -> Optional[int]:
+    """
+    Loudest global_gain among the frame's Layer III granules (None if silent or not Layer III).
+
+    global_gain sets the quantizer step of each granule, 1.5 dB per step,
+    so it tracks loudness closely enough for a waveform overview.
+    """
+    if info['layer'] != 3:
+        return None
+    start = 6 if info['crc'] else 4
+    mono = info['channels'] == 1
+    if info['mpeg1']:
+        side_info_bytes, granules, block_bits = (17 if mono else 32), 2, 59
+        prefix_bits = 9 + (5 if mono else 3) + 4 * info['channels']
+    else:
+        side_info_bytes, granules, block_bits = (9 if mono else 17), 1, 63
+        prefix_bits = 8 + (1 if mono else 2)
+    side_info = frame[start:start + side_info_bytes]
+    if len(side_info) < side_info_bytes:
+        return None
+
+    reader = _BitReader(side_info)
+    level = None
+    for block in range(granules * info['channels']):
+        reader.pos = prefix_bits + block * block_bits
+        part2_3_length = reader.read(12)
+        reader.read(9)  # big_values
+        global_gain = reader.read(8)
+        if part2_3_length and (level is None or global_gain > level):
+            level = global_gain
+    return level
+
+class Mp3Analyzer:
+    """
+    Incremental MP3 analysis: ``feed`` chunks as they are written, then
+    ``result`` for the duration and waveform.
+
+    Only frame headers and Layer III side info are read. A candidate
+    header is accepted when the next frame follows right after it, which
+    skips ID3 tags and garbage without needing the whole file. The Xing /
+    Info / VBRI frame some encoders prepend is metadata, not audio, and is
+    not counted.
+    """
+
+    def __init__(self, resolution: int = WAVEFORM_RESOLUTION):
+        self.resolution = resolution
+        self.frames = 0
+        self.samples_elapsed = 0.0  # In seconds
+        self.sample_rate = None
+        self._levels: List[Optional[int]] = []
+        self._buffer = bytearray()
+        self._skip = 0
+        self._started = False
+        self._first_frame = True
+
+    def feed(self, chunk: bytes):
+        if self._skip:
+            skipped = min(self._skip, len(chunk))
+            chunk = chunk[skipped:]
+            self._skip -= skipped
+        self._buffer += chunk
+        self._consume(final=False)
+
+    def result(self) -> Dict[str, Any]:
+        self._consume(final=True)
+        return {
+            'duration': round(self.samples_elapsed, 3),
+            'sample_rate': self.sample_rate,
+            'frames': self.frames,
+            'waveform_resolution': self.resolution,
+            'waveform': self._waveform()
+        }
+
+    def _consume(self, final: bool):
+        buffer = self._buffer
+        pos = 0
+        if not self._started:
+            if len(buffer) < 10 and not final:
+                return
+            if buffer[:3] == b'ID3' and len(buffer) >= 10:
+                # Tag size is a 28-bit syncsafe integer, excluding the 10-byte header
+                size = 10 + ((buffer[6] << 21) | (buffer[7] << 14) | (buffer[8] << 7) | buffer[9])
+                if buffer[5] & 0x10:
+                    size += 10  # Footer
+                self._skip = max(size - len(buffer), 0)
+                pos = min(size, len(buffer))
+            self._started = True
+
+        while len(buffer) - pos >= 4:
+            info = parse_frame_header(buffer[pos:pos + 4])
+            if not info:
+                pos += 1
+                continue
+            end = pos + info['length']
+            if len(buffer) < end + 4 and not final:
+                break  # Wait for the next header to confirm this one
+            if len(buffer) >= end + 4 and not parse_frame_header(buffer[end:end + 4]) \
+                    and buffer[end:end + 3] != b'TAG':  # ID3v1 trailer after the last frame
+                pos += 1
+                continue
+            if len(buffer) < end:
+                break  # Truncated last frame
+            self._add_frame(bytes(buffer[pos:end]), info)
+            pos = end
+        del buffer[:pos]
+
+    def _add_frame(self, frame: bytes, info: Dict[str, Any]):
+        if self._first_frame:
+            self._first_frame = False
+            if self._is_tag_frame(frame, info):
+                return
+        self.frames += 1
+        self.sample_rate = info['sample_rate']
+        index = int(self.samples_elapsed * self.resolution)
+        level = _frame_level(frame, info)
+        while len(self._levels) <= index:
+            self._levels.append(None)
+        if level is not None and (self._levels[index] is None or level > self._levels[index]):
+            self._levels[index] = level
+        self.samples_elapsed += info['samples'] / info['sample_rate']
+
+    @staticmethod
+    def _is_tag_frame(frame: bytes, info: Dict[str, Any]) -> bool:
+        start = 6 if info['crc'] else 4
+        head = frame[start:start + 40]
+        return b'Xing' in head or b'Info' in head or frame[36:40] == b'VBRI'
+
+    def _waveform(self) -> List[float]:
+        """Per-bucket peaks in 0..1 relative to the loudest, on a log scale"""
+        loudest = max((level for level in self._levels if level is not None), default=None)
+        points = int(self.samples_elapsed * self.resolution + 0.999)
+        peaks = []
+        for index in range(points):
+            level = self._levels[index] if index < len(self._levels) else None
+            if level is None or loudest is None:
+                peaks.append(0.0)
+                continue
+            db_below = (loudest - level) * 1.5
+            peaks.append(round(max(0.0, 1 - db_below / WAVEFORM_RANGE_DB), 3))
+        return peaks
+
+def analyze_mp3(audio: bytes) -> Dict[str, Any]:
+    analyzer = Mp3Analyzer()
+    analyzer.feed(audio)
+    return analyzer.result()
@@ -0,0 +1,79 @@
+"""
+Circuit Breaker
+Stops sending work to an upstream model that keeps failing or responding
+slowly, and lets a single trial request through after a cooldown
+"""
+
+import threading
+import time
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker.
+
+    closed    -- calls flow; consecutive failures are counted
+    open      -- calls are rejected immediately until ``recovery_timeout`` passes
+    half_open -- one trial call is allowed; success closes, failure re-opens
+
+    A call slower than ``slow_call_seconds`` counts as a failure even if it
+    eventually succeeded.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30,
+                 slow_call_seconds: float = 20):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.time() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may proceed; in half-open state only one caller gets True"""
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.time() - self._opened_at < self.recovery_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self._state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self, duration: float = 0.0):
+        if duration >= self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.time()
+
+    def release(self):
+        """Give back a half-open trial slot when the call was not attempted or was inconclusive"""
+        with self._lock:
+            self._trial_in_flight = False
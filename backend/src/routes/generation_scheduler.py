@@ -0,0 +1,221 @@
+"""
+Generation Scheduler
+Sits between the video job queue and PolloAIClient, releasing jobs to the
+workers only when their model has a free concurrency slot and request
+budget, in subscription-priority order. Slots and budgets are tracked in
+memory, so the model limits apply per process: with several worker
+processes each one admits up to the full limit
+"""
+
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from src.models.subscription import SubscriptionPlan
+from .video_events import video_events, COMPLETION_TOPIC
+
+# Per-model ceilings: concurrent renders in flight and submissions per minute.
+# Override with VIDEO_MODEL_LIMITS='{"kling-1.6": {"concurrency": 20, "rpm": 120}}'
+DEFAULT_MODEL_LIMITS = {
+    'kling-1.6': {'concurrency': 10, 'rpm': 60},
+    'runway-gen3': {'concurrency': 5, 'rpm': 30},
+    'veo-2': {'concurrency': 5, 'rpm': 30},
+    'luma-dream': {'concurrency': 10, 'rpm': 60},
+    'pika-1.5': {'concurrency': 10, 'rpm': 60},
+}
+FALLBACK_MODEL_LIMIT = {'concurrency': 5, 'rpm': 30}
+
+# A render that has not reported a terminal status by then (lost webhook, stuck
+# upstream) stops holding its model's slot
+SLOT_TIMEOUT_SECONDS = int(os.environ.get('VIDEO_SLOT_TIMEOUT_SECONDS', 3600))
+
+# Lower runs first
+TIER_PRIORITY = {'enterprise': 0, 'business': 1, 'pro': 2, 'starter': 3, 'free': 4}
+
+def load_model_limits() -> Dict[str, Dict[str, int]]:
+    limits = {model: dict(limit) for model, limit in DEFAULT_MODEL_LIMITS.items()}
+    overrides = os.environ.get('VIDEO_MODEL_LIMITS')
+    if overrides:
+        for model, limit in json.loads(overrides).items():
+            limits.setdefault(model, dict(FALLBACK_MODEL_LIMIT)).update(limit)
+    return limits
+
+def job_priority(user) -> int:
+    """
+    Scheduling priority for a user's jobs, lower first.
+
+    Tiers are spaced two apart so a plan with priority_support moves its
+    jobs ahead of other jobs on the same tier without overtaking the next tier.
+    """
+    tier = user.subscription_tier if user else 'free'
+    priority = TIER_PRIORITY.get(tier, TIER_PRIORITY['free']) * 2
+    plan = SubscriptionPlan.query.filter_by(tier=tier, is_active=True).first()
+    if plan and plan.priority_support:
+        priority -= 1
+    return priority
+
+@dataclass
+class ModelState:
+    concurrency: int
+    rpm: int
+    tokens: float
+    refilled_at: float
+    active: int = 0
+    pending: List[Tuple[int, int, str]] = field(default_factory=list)
+
+    def refill(self, now: float):
+        self.tokens = min(self.rpm, self.tokens + (now - self.refilled_at) * self.rpm / 60)
+        self.refilled_at = now
+
+class GenerationScheduler:
+    """
+    Per-model admission control for Pollo AI submissions.
+
+    A job counts against its model's concurrency from dispatch until its
+    render reaches a terminal status (via the completion topic), its
+    submission fails, or ``slot_timeout`` passes. Submissions per model are
+    limited by a token bucket refilled at ``rpm`` per minute.
+
+    A video is held at most once, pending or active: submitting one that is
+    already scheduled is a no-op, so it is never dispatched twice by this
+    process and a losing dispatch cannot free the winner's slot.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, int]] = None, slot_timeout: float = None):
+        self.limits = limits or load_model_limits()
+        self.slot_timeout = slot_timeout or SLOT_TIMEOUT_SECONDS
+        self._models: Dict[str, ModelState] = {}
+        self._pending_videos: Set[str] = set()
+        self._active_videos: Dict[str, Tuple[str, float]] = {}  # video_id -> (model_id, slot taken at)
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._dispatch: Optional[Callable[[str], None]] = None
+        self._started = False
+
+    def start(self, dispatch: Callable[[str], None]):
+        """Begin releasing jobs to ``dispatch`` (called with each runnable video ID)"""
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+            self._dispatch = dispatch
+
+        # Unbounded so no completion is dropped and no slot leaks
+        completions = video_events.subscribe(COMPLETION_TOPIC, maxsize=0)
+        threading.Thread(target=self._completion_loop, args=(completions,),
+                         name='generation-scheduler-completions', daemon=True).start()
+        threading.Thread(target=self._dispatch_loop,
+                         name='generation-scheduler', daemon=True).start()
+
+    def submit(self, video_id: str, model_id: str, priority: int):
+        with self._cond:
+            if video_id in self._pending_videos or video_id in self._active_videos:
+                return
+            self._pending_videos.add(video_id)
+            state = self._state(model_id)
+            heapq.heappush(state.pending, (priority, next(self._sequence), video_id))
+            self._cond.notify()
+
+    def mark_active(self, video_id: str, model_id: str):
+        """Count a render already in flight (e.g. recovered after a restart)"""
+        with self._cond:
+            if video_id not in self._active_videos:
+                self._active_videos[video_id] = (model_id, time.time())
+                self._state(model_id).active += 1
+
+    def release(self, video_id: str):
+        """Free the slot held by a video whose submission failed or render finished"""
+        with self._cond:
+            slot = self._active_videos.pop(video_id, None)
+            if slot is None:
+                return
+            self._state(slot[0]).active -= 1
+            self._cond.notify()
+
+    def reassign(self, video_id: str, model_id: str):
+        """Move an active video's slot to the model it was failed over to"""
+        with self._cond:
+            slot = self._active_videos.get(video_id)
+            if slot is None or slot[0] == model_id:
+                return
+            self._state(slot[0]).active -= 1
+            self._state(model_id).active += 1
+            self._active_videos[video_id] = (model_id, slot[1])
+            self._cond.notify()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._cond:
+            return {
+                model_id: {
+                    'active': state.active,
+                    'pending': len(state.pending),
+                    'concurrency': state.concurrency,
+                    'rpm': state.rpm
+                }
+                for model_id, state in self._models.items()
+            }
+
+    def _state(self, model_id: str) -> ModelState:
+        state = self._models.get(model_id)
+        if state is None:
+            limit = self.limits.get(model_id, FALLBACK_MODEL_LIMIT)
+            state = ModelState(
+                concurrency=limit['concurrency'],
+                rpm=limit['rpm'],
+                tokens=limit['rpm'],
+                refilled_at=time.time()
+            )
+            self._models[model_id] = state
+        return state
+
+    def _expire_stale_slots(self, now: float) -> Optional[float]:
+        """Free slots held past ``slot_timeout``; return how long until the next one expires"""
+        wait = None
+        for video_id, (model_id, taken_at) in list(self._active_videos.items()):
+            remaining = taken_at + self.slot_timeout - now
+            if remaining <= 0:
+                del self._active_videos[video_id]
+                self._state(model_id).active -= 1
+            else:
+                wait = remaining if wait is None else min(wait, remaining)
+        return wait
+
+    def _collect_runnable(self) -> Tuple[List[str], Optional[float]]:
+        """Pop every job that can run now; also return how long until a token or slot frees up"""
+        now = time.time()
+        runnable = []
+        wait = self._expire_stale_slots(now)
+        for model_id, state in self._models.items():
+            state.refill(now)
+            while state.pending and state.active < state.concurrency and state.tokens >= 1:
+                _, _, video_id = heapq.heappop(state.pending)
+                self._pending_videos.discard(video_id)
+                state.tokens -= 1
+                state.active += 1
+                self._active_videos[video_id] = (model_id, now)
+                runnable.append(video_id)
+
+            if state.pending and state.active < state.concurrency:
+                until_token = (1 - state.tokens) * 60 / state.rpm
+                wait = until_token if wait is None else min(wait, until_token)
+        return runnable, wait
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                runnable, wait = self._collect_runnable()
+                if not runnable:
+                    self._cond.wait(wait)
+                    continue
+            for video_id in runnable:
+                self._dispatch(video_id)
+
+    def _completion_loop(self, completions):
+        while True:
+            event = completions.get()
+            self.release(event['video_id'])
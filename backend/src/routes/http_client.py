@@ -0,0 +1,157 @@
+"""
+Shared HTTP Client Layer
+Pooled keep-alive sessions for upstream AI provider APIs, plus the asyncio
+equivalents used for high fan-out callers
+"""
+
+import asyncio
+import os
+import random
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 20))
+DEFAULT_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 3))
+DEFAULT_BACKOFF_FACTOR = float(os.environ.get('HTTP_BACKOFF_FACTOR', 0.5))
+DEFAULT_TIMEOUT = (
+    float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5)),
+    float(os.environ.get('HTTP_READ_TIMEOUT', 30))
+)
+
+# Upstream statuses worth retrying; Retry-After is honoured for 429/503
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Methods that may be re-sent after the server could have seen them
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+Timeout = Union[float, Tuple[float, float]]
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to every request it sends"""
+
+    def __init__(self, *args, timeout: Timeout = DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+def build_session(pool_size: int = DEFAULT_POOL_SIZE,
+                  max_retries: int = DEFAULT_MAX_RETRIES,
+                  backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                  timeout: Timeout = DEFAULT_TIMEOUT) -> requests.Session:
+    """
+    Build a keep-alive session with a bounded connection pool.
+
+    Connection failures are retried for every method because the request
+    never reached the server. Read errors and retryable statuses are only
+    retried for idempotent methods, so a POST that starts a paid render is
+    never silently submitted twice.
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        backoff_jitter=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+        timeout=timeout
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+def get_session(base_url: str, **kwargs) -> requests.Session:
+    """
+    Return the process-wide session for the host of ``base_url``.
+
+    The first caller for a host decides its pool settings (see build_session);
+    later callers share the same pool and its warm connections.
+    """
+    host = urlparse(base_url).netloc
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = build_session(**kwargs)
+            _sessions[host] = session
+    return session
+
+def build_async_session(pool_size: int = DEFAULT_POOL_SIZE,
+                        timeout: Timeout = DEFAULT_TIMEOUT) -> aiohttp.ClientSession:
+    """
+    Build an aiohttp session with a bounded keep-alive pool.
+
+    Must be called from a running event loop; the session is bound to it.
+    """
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    connector = aiohttp.TCPConnector(limit=pool_size, limit_per_host=pool_size, ttl_dns_cache=300)
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+    )
+
+def backoff_delay(attempt: int, backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                  retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry ``attempt`` (0-based): Retry-After if given, else jittered exponential"""
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            pass  # HTTP-date form; fall back to our own schedule
+    return backoff_factor * (2 ** attempt) + random.uniform(0, backoff_factor)
+
+async def async_request_json(session: aiohttp.ClientSession, method: str, url: str,
+                             max_retries: int = DEFAULT_MAX_RETRIES,
+                             backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                             **kwargs) -> Dict[str, Any]:
+    """
+    Send a request and return its JSON body, raising aiohttp.ClientResponseError
+    on an error status.
+
+    Follows the same retry policy as build_session: connection failures are
+    retried for every method, read errors and RETRY_STATUSES only for
+    idempotent ones.
+    """
+    idempotent = method.upper() in IDEMPOTENT_METHODS
+    attempt = 0
+    while True:
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                if response.status in RETRY_STATUSES and idempotent and attempt < max_retries:
+                    delay = backoff_delay(attempt, backoff_factor, response.headers.get('Retry-After'))
+                else:
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+        except (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError):
+            # The request never reached the server
+            if attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt, backoff_factor)
+        except (aiohttp.ServerDisconnectedError, aiohttp.ClientPayloadError, asyncio.TimeoutError):
+            if not idempotent or attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt, backoff_factor)
+
+        attempt += 1
+        await asyncio.sleep(delay)
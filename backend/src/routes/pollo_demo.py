@@ -0,0 +1,168 @@
+"""
+Pollo AI Demo Clients
+Offline stand-ins for PolloAIClient and AsyncPolloAIClient, selected at
+startup when no POLLO_API_KEY is configured. Renders "complete" 30 seconds
+after submission; nothing leaves the process
+"""
+
+import time
+import uuid
+from typing import Any, Dict, List
+
+from .pollo_integration import PolloAIClient, AsyncPolloAIClient
+
+# Catalog served by the demo clients and by the local mock server (tools/mock_pollo_server.py)
+DEMO_MODELS = [
+    {
+        "id": "kling-1.6",
+        "name": "Kling AI 1.6",
+        "provider": "Kling",
+        "quality_rating": 4.8,
+        "credits_per_second": 1.2,
+        "estimated_time": "2-3 minutes",
+        "max_duration": 10,
+        "resolution": ["720p", "1080p"],
+        "features": ["text-to-video", "image-to-video"],
+        "description": "Latest Kling model with enhanced realism and physics"
+    },
+    {
+        "id": "runway-gen3",
+        "name": "Runway Gen-3 Alpha",
+        "provider": "Runway",
+        "quality_rating": 4.9,
+        "credits_per_second": 1.5,
+        "estimated_time": "1-2 minutes",
+        "max_duration": 8,
+        "resolution": ["1080p"],
+        "features": ["text-to-video", "image-to-video", "video-to-video"],
+        "description": "Professional-grade video generation with cinematic quality"
+    },
+    {
+        "id": "veo-2",
+        "name": "Google Veo 2",
+        "provider": "Google",
+        "quality_rating": 4.7,
+        "credits_per_second": 1.3,
+        "estimated_time": "2-4 minutes",
+        "max_duration": 8,
+        "resolution": ["1080p"],
+        "features": ["text-to-video", "image-to-video"],
+        "description": "Google's advanced video generation with natural physics"
+    },
+    {
+        "id": "luma-dream",
+        "name": "Luma Dream Machine",
+        "provider": "Luma",
+        "quality_rating": 4.5,
+        "credits_per_second": 0.8,
+        "estimated_time": "1-2 minutes",
+        "max_duration": 5,
+        "resolution": ["720p", "1080p"],
+        "features": ["text-to-video", "image-to-video"],
+        "description": "Fast and efficient video generation"
+    },
+    {
+        "id": "pika-1.5",
+        "name": "Pika 1.5",
+        "provider": "Pika",
+        "quality_rating": 4.4,
+        "credits_per_second": 1.0,
+        "estimated_time": "1-3 minutes",
+        "max_duration": 6,
+        "resolution": ["720p", "1080p"],
+        "features": ["text-to-video", "image-to-video"],
+        "description": "Creative video generation with unique styles"
+    }
+]
+
+def demo_submission(duration: int) -> Dict[str, Any]:
+    """Mock submission; the suffix keeps concurrent submissions distinct"""
+    return {
+        "success": True,
+        "video_id": f"video_{int(time.time())}_{uuid.uuid4().hex[:8]}",
+        "status": "processing",
+        "estimated_completion": time.time() + (duration * 30),  # Simulate processing time
+        "message": "Video generation started successfully"
+    }
+
+def demo_status(video_id: str) -> Dict[str, Any]:
+    """Mock status: simulate processing for 30 seconds, then complete"""
+    creation_time = int(video_id.split('_')[1]) if '_' in video_id else int(time.time())
+    elapsed_time = time.time() - creation_time
+    
+    if elapsed_time < 30:  # Still processing
+        progress = min(int((elapsed_time / 30) * 100), 95)
+        return {
+            "success": True,
+            "status": "processing",
+            "progress": progress,
+            "message": f"Generating video... {progress}% complete"
+        }
+    return {
+        "success": True,
+        "status": "completed",
+        "progress": 100,
+        "message": "Video generation completed successfully",
+        "video_url": f"https://demo-videos.pollo.ai/{video_id}.mp4",
+        "thumbnail_url": f"https://demo-videos.pollo.ai/{video_id}_thumb.jpg"
+    }
+
+def demo_result(video_id: str) -> Dict[str, Any]:
+    """Mock completed video data"""
+    return {
+        "success": True,
+        "video_id": video_id,
+        "status": "completed",
+        "video_url": f"https://demo-videos.pollo.ai/{video_id}.mp4",
+        "thumbnail_url": f"https://demo-videos.pollo.ai/{video_id}_thumb.jpg",
+        "duration": 5,
+        "resolution": "1080p",
+        "file_size": "15.2 MB",
+        "created_at": time.time(),
+        "metadata": {
+            "model_used": "kling-1.6",
+            "prompt": "Demo video generation",
+            "aspect_ratio": "16:9",
+            "quality": "high"
+        }
+    }
+
+class DemoPolloAIClient(PolloAIClient):
+    """PolloAIClient that answers from the demo catalog and simulated renders"""
+
+    demo_mode = True
+
+    def __init__(self, **options):
+        super().__init__(api_key=None, **options)
+
+    def _load_models(self) -> List[Dict[str, Any]]:
+        return DEMO_MODELS
+
+    def _submit_video(self, prompt: str, model_id: str, duration: int,
+                      aspect_ratio: str, quality: str) -> Dict[str, Any]:
+        return demo_submission(duration)
+
+    def get_video_status(self, video_id: str) -> Dict[str, Any]:
+        return demo_status(video_id)
+
+    def get_video_statuses(self, video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return {video_id: demo_status(video_id) for video_id in video_ids}
+
+    def get_video_result(self, video_id: str) -> Dict[str, Any]:
+        return demo_result(video_id)
+
+class DemoAsyncPolloAIClient(AsyncPolloAIClient):
+    """AsyncPolloAIClient counterpart of DemoPolloAIClient"""
+
+    async def _submit_video(self, prompt: str, model_id: str, duration: int,
+                            aspect_ratio: str, quality: str) -> Dict[str, Any]:
+        return demo_submission(duration)
+
+    async def get_video_status(self, video_id: str) -> Dict[str, Any]:
+        return demo_status(video_id)
+
+    async def get_video_statuses(self, video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return {video_id: demo_status(video_id) for video_id in video_ids}
+
+    async def get_video_result(self, video_id: str) -> Dict[str, Any]:
+        return demo_result(video_id)
@@ -3,92 +3,71 @@ Pollo AI Integration Module
 Handles communication with Pollo AI API for video generation
 """
 
+import os
+import asyncio
+import hashlib
+import threading
+import weakref
 import requests
 import json
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from flask import current_app
 
+import aiohttp
+
+from .http_client import get_session, build_async_session, async_request_json
+from .ttl_cache import TTLCache
+from .circuit_breaker import CircuitBreaker
+
 class PolloAIClient:
-    def __init__(self, api_key: str = None):
-        self.api_key = api_key or "demo_key"  # Use demo key for now
-        self.base_url = "https://api.pollo.ai/v1"
+    # Set on the offline stub (pollo_demo.DemoPolloAIClient)
+    demo_mode = False
+
+    def __init__(self, api_key: str, base_url: str = None, pool_size: int = None,
+                 timeout: float = None, webhook_url: str = None):
+        self.api_key = api_key
+        self.base_url = (base_url or "https://api.pollo.ai/v1").rstrip('/')
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        self.timeout = (5, timeout or 60)
+        # Pollo AI calls this URL when a render finishes (see videos.pollo_webhook)
+        self.webhook_url = webhook_url
+        self.session = get_session(
+            self.base_url,
+            pool_size=pool_size or 20,
+            timeout=self.timeout
+        )
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
+        # The catalog changes rarely; serve it from memory and refresh in the background
+        self._models_cache = TTLCache(
+            ttl=float(os.environ.get('POLLO_MODELS_TTL', 3600)),
+            stale_ttl=float(os.environ.get('POLLO_MODELS_STALE_TTL', 86400))
+        )
+
+    def _request(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        """Call the Pollo AI API over the shared keep-alive session"""
+        kwargs.setdefault('timeout', self.timeout)
+        response = self.session.request(
+            method,
+            f"{self.base_url}{path}",
+            headers=self.headers,
+            **kwargs
+        )
+        response.raise_for_status()
+        return response.json()
     
     def get_available_models(self) -> Dict[str, Any]:
-        """Get list of available video generation models from Pollo AI"""
+        """Get list of available video generation models from Pollo AI (cached)"""
         try:
-            # For demo purposes, return mock data
-            # In production, this would call the real Pollo AI API
-            models = [
-                {
-                    "id": "kling-1.6",
-                    "name": "Kling AI 1.6",
-                    "provider": "Kling",
-                    "quality_rating": 4.8,
-                    "credits_per_second": 1.2,
-                    "estimated_time": "2-3 minutes",
-                    "max_duration": 10,
-                    "resolution": ["720p", "1080p"],
-                    "features": ["text-to-video", "image-to-video"],
-                    "description": "Latest Kling model with enhanced realism and physics"
-                },
-                {
-                    "id": "runway-gen3",
-                    "name": "Runway Gen-3 Alpha",
-                    "provider": "Runway",
-                    "quality_rating": 4.9,
-                    "credits_per_second": 1.5,
-                    "estimated_time": "1-2 minutes",
-                    "max_duration": 8,
-                    "resolution": ["1080p"],
-                    "features": ["text-to-video", "image-to-video", "video-to-video"],
-                    "description": "Professional-grade video generation with cinematic quality"
-                },
-                {
-                    "id": "veo-2",
-                    "name": "Google Veo 2",
-                    "provider": "Google",
-                    "quality_rating": 4.7,
-                    "credits_per_second": 1.3,
-                    "estimated_time": "2-4 minutes",
-                    "max_duration": 8,
-                    "resolution": ["1080p"],
-                    "features": ["text-to-video", "image-to-video"],
-                    "description": "Google's advanced video generation with natural physics"
-                },
-                {
-                    "id": "luma-dream",
-                    "name": "Luma Dream Machine",
-                    "provider": "Luma",
-                    "quality_rating": 4.5,
-                    "credits_per_second": 0.8,
-                    "estimated_time": "1-2 minutes",
-                    "max_duration": 5,
-                    "resolution": ["720p", "1080p"],
-                    "features": ["text-to-video", "image-to-video"],
-                    "description": "Fast and efficient video generation"
-                },
-                {
-                    "id": "pika-1.5",
-                    "name": "Pika 1.5",
-                    "provider": "Pika",
-                    "quality_rating": 4.4,
-                    "credits_per_second": 1.0,
-                    "estimated_time": "1-3 minutes",
-                    "max_duration": 6,
-                    "resolution": ["720p", "1080p"],
-                    "features": ["text-to-video", "image-to-video"],
-                    "description": "Creative video generation with unique styles"
-                }
-            ]
-            
+            catalog = self._models_cache.get('models', self._fetch_models)
             return {
                 "success": True,
-                "models": models
+                "models": catalog["models"],
+                "etag": catalog["etag"]
             }
             
         except Exception as e:
@@ -97,14 +76,98 @@ class PolloAIClient:
                 "success": False,
                 "error": str(e)
             }
+
+    def _fetch_models(self) -> Dict[str, Any]:
+        """Load the model catalog and fingerprint it for HTTP caching"""
+        models = self._load_models()
+        etag = hashlib.sha256(json.dumps(models, sort_keys=True).encode()).hexdigest()[:32]
+        return {"models": models, "etag": etag}
+
+    def _load_models(self) -> List[Dict[str, Any]]:
+        return self._request("GET", "/models").get("models", [])
     
     def generate_video(self, prompt: str, model_id: str, duration: int = 5, 
-                      aspect_ratio: str = "16:9", quality: str = "high") -> Dict[str, Any]:
-        """Generate video using Pollo AI"""
+                      aspect_ratio: str = "16:9", quality: str = "high",
+                      allow_fallback: bool = False) -> Dict[str, Any]:
+        """
+        Generate video using Pollo AI.
+
+        Each model sits behind a circuit breaker, so a degraded model fails
+        fast instead of holding the caller for a full timeout. With
+        ``allow_fallback`` the request is rerouted to an equivalent model
+        (see _fallback_models); ``model_id`` in the result names the model used.
+        """
+        candidates = [model_id]
+        if allow_fallback:
+            candidates += self._fallback_models(model_id, duration)
+
+        error = f"Model {model_id} is temporarily unavailable"
+        for candidate in candidates:
+            breaker = self._breaker(candidate)
+            if not breaker.allow():
+                continue
+
+            started = time.time()
+            result = self._submit_video(prompt, candidate, duration, aspect_ratio, quality)
+            if result["success"]:
+                breaker.record_success(time.time() - started)
+                result["model_id"] = candidate
+                return result
+
+            if not result.pop("upstream_fault", True):
+                # The request itself was rejected; another model would reject it too
+                breaker.release()
+                return result
+
+            breaker.record_failure()
+            error = result["error"]
+
+        return {
+            "success": False,
+            "error": error
+        }
+
+    def _breaker(self, model_id: str) -> CircuitBreaker:
+        with self._breakers_lock:
+            breaker = self._breakers.get(model_id)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    failure_threshold=int(os.environ.get('POLLO_BREAKER_FAILURES', 5)),
+                    recovery_timeout=float(os.environ.get('POLLO_BREAKER_COOLDOWN', 30)),
+                    slow_call_seconds=float(os.environ.get('POLLO_BREAKER_SLOW_SECONDS', 20))
+                )
+                self._breakers[model_id] = breaker
+        return breaker
+
+    def breaker_states(self) -> Dict[str, str]:
+        """Current circuit state per model that has been called"""
+        with self._breakers_lock:
+            return {model_id: breaker.state for model_id, breaker in self._breakers.items()}
+
+    def _fallback_models(self, model_id: str, duration: int) -> List[str]:
+        """
+        Models that can stand in for ``model_id``: they must offer at least
+        its features and support the requested duration. Best rated first.
+        """
+        catalog = self.get_available_models().get("models", [])
+        original = next((m for m in catalog if m["id"] == model_id), None)
+        if not original:
+            return []
+
+        required_features = set(original.get("features", []))
+        equivalents = [
+            m for m in catalog
+            if m["id"] != model_id
+            and required_features <= set(m.get("features", []))
+            and m.get("max_duration", 0) >= duration
+        ]
+        equivalents.sort(key=lambda m: m.get("quality_rating", 0), reverse=True)
+        return [m["id"] for m in equivalents]
+
+    def _submit_video(self, prompt: str, model_id: str, duration: int,
+                      aspect_ratio: str, quality: str) -> Dict[str, Any]:
+        """Submit one render to a specific model"""
         try:
-            # For demo purposes, simulate video generation
-            # In production, this would call the real Pollo AI API
-            
             payload = {
                 "prompt": prompt,
                 "model": model_id,
@@ -112,55 +175,27 @@ class PolloAIClient:
                 "aspect_ratio": aspect_ratio,
                 "quality": quality
             }
-            
-            # Simulate API call delay
-            time.sleep(1)
-            
-            # Return mock response
-            video_id = f"video_{int(time.time())}"
-            
-            return {
-                "success": True,
-                "video_id": video_id,
-                "status": "processing",
-                "estimated_completion": time.time() + (duration * 30),  # Simulate processing time
-                "message": "Video generation started successfully"
-            }
+            if self.webhook_url:
+                payload["webhook_url"] = self.webhook_url
+
+            data = self._request("POST", "/videos/generate", json=payload)
+            return submission_from_payload(data)
             
         except Exception as e:
             current_app.logger.error(f"Failed to generate video with Pollo AI: {str(e)}")
+            status_code = getattr(getattr(e, "response", None), "status_code", None)
             return {
                 "success": False,
-                "error": str(e)
+                "error": str(e),
+                # 4xx (other than 429) means our request was bad, not that the model is degraded
+                "upstream_fault": not (status_code and 400 <= status_code < 500 and status_code != 429)
             }
     
     def get_video_status(self, video_id: str) -> Dict[str, Any]:
         """Check video generation status"""
         try:
-            # For demo purposes, simulate status checking
-            # In production, this would call the real Pollo AI API
-            
-            # Simulate processing for 30 seconds, then complete
-            creation_time = int(video_id.split('_')[1]) if '_' in video_id else int(time.time())
-            elapsed_time = time.time() - creation_time
-            
-            if elapsed_time < 30:  # Still processing
-                progress = min(int((elapsed_time / 30) * 100), 95)
-                return {
-                    "success": True,
-                    "status": "processing",
-                    "progress": progress,
-                    "message": f"Generating video... {progress}% complete"
-                }
-            else:  # Completed
-                return {
-                    "success": True,
-                    "status": "completed",
-                    "progress": 100,
-                    "message": "Video generation completed successfully",
-                    "video_url": f"https://demo-videos.pollo.ai/{video_id}.mp4",
-                    "thumbnail_url": f"https://demo-videos.pollo.ai/{video_id}_thumb.jpg"
-                }
+            data = self._request("GET", f"/videos/{video_id}/status")
+            return status_from_payload(data)
                 
         except Exception as e:
             current_app.logger.error(f"Failed to get video status from Pollo AI: {str(e)}")
@@ -169,30 +204,198 @@ class PolloAIClient:
                 "error": str(e)
             }
     
+    def get_video_statuses(self, video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Check the status of several videos in one request, keyed by video ID"""
+        try:
+            data = self._request("GET", "/videos/status", params={"ids": ",".join(video_ids)})
+            return {
+                item.get("task_id") or item.get("id"): status_from_payload(item)
+                for item in data.get("videos", [])
+            }
+
+        except Exception as e:
+            current_app.logger.error(f"Failed to get batch video status from Pollo AI: {str(e)}")
+            return {video_id: {"success": False, "error": str(e)} for video_id in video_ids}
+    
     def get_video_result(self, video_id: str) -> Dict[str, Any]:
         """Get completed video result"""
         try:
-            # For demo purposes, return mock video data
-            # In production, this would call the real Pollo AI API
+            data = self._request("GET", f"/videos/{video_id}")
+            data.setdefault("video_id", video_id)
+            return {"success": True, **data}
             
+        except Exception as e:
+            current_app.logger.error(f"Failed to get video result from Pollo AI: {str(e)}")
             return {
-                "success": True,
-                "video_id": video_id,
-                "status": "completed",
-                "video_url": f"https://demo-videos.pollo.ai/{video_id}.mp4",
-                "thumbnail_url": f"https://demo-videos.pollo.ai/{video_id}_thumb.jpg",
-                "duration": 5,
-                "resolution": "1080p",
-                "file_size": "15.2 MB",
-                "created_at": time.time(),
-                "metadata": {
-                    "model_used": "kling-1.6",
-                    "prompt": "Demo video generation",
-                    "aspect_ratio": "16:9",
-                    "quality": "high"
-                }
+                "success": False,
+                "error": str(e)
             }
-            
+
+def submission_from_payload(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a /videos/generate response"""
+    return {
+        "success": True,
+        "video_id": data.get("task_id") or data.get("id"),
+        "status": data.get("status", "processing"),
+        "estimated_completion": data.get("estimated_completion"),
+        "message": "Video generation started successfully"
+    }
+
+def status_from_payload(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a status entry from /videos/{id}/status or /videos/status"""
+    return {
+        "success": True,
+        "status": data.get("status", "processing"),
+        "progress": data.get("progress", 0),
+        "message": data.get("message", ""),
+        "video_url": data.get("video_url"),
+        "thumbnail_url": data.get("thumbnail_url")
+    }
+
+def parse_estimated_time(estimated_time: str) -> Dict[str, int]:
+    """Convert a catalog estimate such as '2-3 minutes' into a seconds range"""
+    try:
+        amount, unit = estimated_time.split()
+        low, _, high = amount.partition('-')
+        multiplier = 60 if unit.startswith('minute') else 1
+        return {
+            "min_seconds": int(float(low) * multiplier),
+            "max_seconds": int(float(high or low) * multiplier)
+        }
+    except (AttributeError, ValueError):
+        return {"min_seconds": 60, "max_seconds": 180}
+
+class AsyncPolloAIClient:
+    """
+    asyncio counterpart of PolloAIClient for high fan-out callers.
+
+    Wraps a PolloAIClient and shares its credentials, catalog cache and
+    circuit breakers, so sync and async callers see the same model health.
+    aiohttp sessions are bound to an event loop, so each loop gets its own
+    keep-alive pool of ``pool_size`` connections.
+    """
+
+    def __init__(self, client: PolloAIClient, pool_size: int = None):
+        self.client = client
+        self.pool_size = pool_size or 100
+        self._sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = \
+            weakref.WeakKeyDictionary()
+
+    def _session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = build_async_session(pool_size=self.pool_size, timeout=self.client.timeout)
+            self._sessions[loop] = session
+        return session
+
+    async def close(self):
+        """Close the running loop's session; call before the loop shuts down"""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session:
+            await session.close()
+
+    async def _request(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        return await async_request_json(
+            self._session(),
+            method,
+            f"{self.client.base_url}{path}",
+            headers=self.client.headers,
+            **kwargs
+        )
+
+    async def get_available_models(self) -> Dict[str, Any]:
+        """Get the model catalog from the shared cache (loaded off the event loop on a miss)"""
+        return await asyncio.to_thread(self.client.get_available_models)
+
+    async def generate_video(self, prompt: str, model_id: str, duration: int = 5,
+                             aspect_ratio: str = "16:9", quality: str = "high",
+                             allow_fallback: bool = False) -> Dict[str, Any]:
+        """Generate video using Pollo AI; see PolloAIClient.generate_video"""
+        candidates = [model_id]
+        if allow_fallback:
+            candidates += await asyncio.to_thread(self.client._fallback_models, model_id, duration)
+
+        error = f"Model {model_id} is temporarily unavailable"
+        for candidate in candidates:
+            breaker = self.client._breaker(candidate)
+            if not breaker.allow():
+                continue
+
+            started = time.time()
+            result = await self._submit_video(prompt, candidate, duration, aspect_ratio, quality)
+            if result["success"]:
+                breaker.record_success(time.time() - started)
+                result["model_id"] = candidate
+                return result
+
+            if not result.pop("upstream_fault", True):
+                breaker.release()
+                return result
+
+            breaker.record_failure()
+            error = result["error"]
+
+        return {
+            "success": False,
+            "error": error
+        }
+
+    async def _submit_video(self, prompt: str, model_id: str, duration: int,
+                            aspect_ratio: str, quality: str) -> Dict[str, Any]:
+        try:
+            payload = {
+                "prompt": prompt,
+                "model": model_id,
+                "duration": duration,
+                "aspect_ratio": aspect_ratio,
+                "quality": quality
+            }
+            if self.client.webhook_url:
+                payload["webhook_url"] = self.client.webhook_url
+
+            data = await self._request("POST", "/videos/generate", json=payload)
+            return submission_from_payload(data)
+
+        except Exception as e:
+            current_app.logger.error(f"Failed to generate video with Pollo AI: {str(e)}")
+            status_code = getattr(e, "status", None)
+            return {
+                "success": False,
+                "error": str(e),
+                "upstream_fault": not (status_code and 400 <= status_code < 500 and status_code != 429)
+            }
+
+    async def get_video_status(self, video_id: str) -> Dict[str, Any]:
+        """Check video generation status"""
+        try:
+            data = await self._request("GET", f"/videos/{video_id}/status")
+            return status_from_payload(data)
+        except Exception as e:
+            current_app.logger.error(f"Failed to get video status from Pollo AI: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
+    async def get_video_statuses(self, video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Check the status of several videos in one request, keyed by video ID"""
+        try:
+            data = await self._request("GET", "/videos/status", params={"ids": ",".join(video_ids)})
+            return {
+                item.get("task_id") or item.get("id"): status_from_payload(item)
+                for item in data.get("videos", [])
+            }
+        except Exception as e:
+            current_app.logger.error(f"Failed to get batch video status from Pollo AI: {str(e)}")
+            return {video_id: {"success": False, "error": str(e)} for video_id in video_ids}
+
+    async def get_video_result(self, video_id: str) -> Dict[str, Any]:
+        """Get completed video result"""
+        try:
+            data = await self._request("GET", f"/videos/{video_id}")
+            data.setdefault("video_id", video_id)
+            return {"success": True, **data}
         except Exception as e:
             current_app.logger.error(f"Failed to get video result from Pollo AI: {str(e)}")
             return {
@@ -200,6 +403,27 @@ class PolloAIClient:
                 "error": str(e)
             }
 
-# Global instance
-pollo_client = PolloAIClient()
+def create_pollo_clients() -> Tuple[PolloAIClient, AsyncPolloAIClient]:
+    """
+    The Pollo AI clients for this process: the real ones when POLLO_API_KEY
+    is set, otherwise the offline stubs in pollo_demo (for a full local
+    pipeline against a fake API, use tools/mock_pollo_server.py instead)
+    """
+    options = dict(
+        base_url=os.environ.get('POLLO_API_BASE'),
+        pool_size=int(os.environ.get('POLLO_POOL_SIZE', 20)),
+        timeout=float(os.environ.get('POLLO_TIMEOUT', 60)),
+        webhook_url=os.environ.get('POLLO_WEBHOOK_URL')
+    )
+    async_pool_size = int(os.environ.get('POLLO_ASYNC_POOL_SIZE', 100))
+    api_key = os.environ.get('POLLO_API_KEY')
+    if not api_key:
+        from .pollo_demo import DemoPolloAIClient, DemoAsyncPolloAIClient
+        client = DemoPolloAIClient(**options)
+        return client, DemoAsyncPolloAIClient(client, pool_size=async_pool_size)
+
+    client = PolloAIClient(api_key=api_key, **options)
+    return client, AsyncPolloAIClient(client, pool_size=async_pool_size)
 
+# Global instances
+pollo_client, async_pollo_client = create_pollo_clients()
@@ -0,0 +1,193 @@
+"""
+Voice Preview Cache
+On-disk cache for proxied voice preview audio. Entries are revalidated
+upstream with conditional GETs, and concurrent requests for the same URL
+share a single upstream fetch. Least-recently-used entries are evicted to
+a size budget
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional, Tuple
+
+from .http_client import get_session
+
+@dataclass
+class PreviewEntry:
+    url: str
+    content_type: str
+    size: int
+    etag: str  # Strong ETag of the cached bytes, sent to our clients
+    fetched_at: float
+    upstream_etag: Optional[str] = None
+    upstream_last_modified: Optional[str] = None
+
+class UpstreamError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"Upstream error: {status_code}")
+        self.status_code = status_code
+
+class PreviewCache:
+    """
+    Cache of remote preview files under ``directory``.
+
+    An entry younger than ``ttl`` is served without contacting upstream.
+    Older entries are revalidated with If-None-Match / If-Modified-Since;
+    a 304 just renews them. If upstream is unreachable the stale copy is
+    served. Callers for the same URL wait on one fetch instead of each
+    going upstream.
+
+    As in TTSCache, recency is kept in memory and mirrored to file mtimes,
+    and bodies are evicted oldest first once they exceed ``max_bytes``.
+    """
+
+    def __init__(self, directory: Path, ttl: float, max_bytes: int):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> body size
+        self._total_bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(64)]
+
+    def fetch(self, url: str) -> Tuple[PreviewEntry, Path]:
+        """Return the cached entry and file for ``url``, fetching or revalidating as needed"""
+        key = hashlib.sha256(url.encode()).hexdigest()
+        entry = self._read_entry(key)
+        if entry and time.time() - entry.fetched_at < self.ttl:
+            self._touch(key)
+            return entry, self._body_path(key)
+
+        with self._key_lock(key):
+            # Another caller may have refreshed it while we waited
+            entry = self._read_entry(key)
+            if entry and time.time() - entry.fetched_at < self.ttl:
+                return entry, self._body_path(key)
+            return self._refresh(key, url, entry), self._body_path(key)
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        return self._key_locks[int(key[:8], 16) % len(self._key_locks)]
+
+    def _touch(self, key: str):
+        with self._lock:
+            self._ensure_loaded()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        try:
+            os.utime(self._body_path(key))
+        except OSError:
+            pass
+
+    def _stored(self, key: str, size: int):
+        """Account for a newly written body and evict to the budget"""
+        with self._lock:
+            self._ensure_loaded()
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict()
+
+    def _ensure_loaded(self):
+        """Index existing bodies by mtime on first use (caller holds _lock)"""
+        if self._loaded:
+            return
+        files = []
+        for path in self.directory.glob('*.audio'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._loaded = True
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until under budget, always keeping the newest (caller holds _lock)"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._body_path(key).unlink(missing_ok=True)
+            self._meta_path(key).unlink(missing_ok=True)
+
+    def _body_path(self, key: str) -> Path:
+        return self.directory / f"{key}.audio"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _read_entry(self, key: str) -> Optional[PreviewEntry]:
+        try:
+            with open(self._meta_path(key)) as f:
+                entry = PreviewEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        return entry if self._body_path(key).exists() else None
+
+    def _write_entry(self, key: str, entry: PreviewEntry):
+        partial = self.directory / f".{key}.{uuid.uuid4().hex}.json"
+        with open(partial, 'w') as f:
+            json.dump(asdict(entry), f)
+        os.replace(partial, self._meta_path(key))
+
+    def _refresh(self, key: str, url: str, entry: Optional[PreviewEntry]) -> PreviewEntry:
+        headers = {}
+        if entry and entry.upstream_etag:
+            headers['If-None-Match'] = entry.upstream_etag
+        if entry and entry.upstream_last_modified:
+            headers['If-Modified-Since'] = entry.upstream_last_modified
+
+        try:
+            response = get_session(url).get(url, headers=headers, stream=True, timeout=(5, 30))
+        except Exception:
+            if entry:
+                return entry  # Serve stale rather than fail
+            raise
+
+        with response:
+            if response.status_code == 304 and entry:
+                entry.fetched_at = time.time()
+                self._write_entry(key, entry)
+                self._touch(key)
+                return entry
+            if not response.ok:
+                if entry and response.status_code >= 500:
+                    return entry
+                raise UpstreamError(response.status_code)
+
+            self.directory.mkdir(parents=True, exist_ok=True)
+            partial = self.directory / f".{key}.{uuid.uuid4().hex}.part"
+            digest = hashlib.sha256()
+            size = 0
+            try:
+                with open(partial, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=65536):
+                        if chunk:
+                            f.write(chunk)
+                            digest.update(chunk)
+                            size += len(chunk)
+                os.replace(partial, self._body_path(key))
+            finally:
+                partial.unlink(missing_ok=True)
+
+            entry = PreviewEntry(
+                url=url,
+                content_type=response.headers.get('Content-Type', 'audio/mpeg'),
+                size=size,
+                etag=digest.hexdigest()[:32],
+                fetched_at=time.time(),
+                upstream_etag=response.headers.get('ETag'),
+                upstream_last_modified=response.headers.get('Last-Modified')
+            )
+            self._write_entry(key, entry)
+            self._stored(key, size)
+            return entry
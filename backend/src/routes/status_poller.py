@@ -0,0 +1,252 @@
+"""
+Upstream Status Poller
+A single background loop that tracks every in-flight Pollo AI task, checks
+them in batches and writes status and progress to the database, so status
+lookups are local reads and any number of clients share one upstream poll
+"""
+
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import update
+
+from src.models.user import db
+from src.models.video import GeneratedVideo
+from .pollo_integration import pollo_client, async_pollo_client, parse_estimated_time
+from .video_events import publish_video_event, TERMINAL_STATUSES
+
+@dataclass
+class TrackedTask:
+    video_id: str
+    pollo_task_id: str
+    bulk_job_id: Optional[str]
+    submitted_at: float
+    min_seconds: int
+    max_seconds: int
+    next_poll_at: float = 0.0
+    overdue_polls: int = 0
+    last_state: Dict = field(default_factory=dict)
+
+class StatusPoller:
+    """
+    Centralized poller for in-flight renders.
+
+    Poll intervals follow each model's catalog ``estimated_time``: sparse
+    while the render cannot be done yet, every ``interval`` seconds inside the
+    expected window, then exponential backoff (capped at ``max_interval``)
+    once a render runs long.
+
+    Due batches are fetched concurrently (up to ``concurrency`` requests in
+    flight) through AsyncPolloAIClient on an event loop owned by the poll
+    thread; database writes stay on that thread.
+    """
+
+    def __init__(self, interval: float = None, max_interval: float = None, batch_size: int = None,
+                 concurrency: int = None):
+        self.interval = interval or float(os.environ.get('VIDEO_STATUS_POLL_INTERVAL', 3))
+        self.max_interval = max_interval or float(os.environ.get('VIDEO_STATUS_POLL_MAX_INTERVAL', 60))
+        self.batch_size = batch_size or int(os.environ.get('VIDEO_STATUS_POLL_BATCH_SIZE', 50))
+        self.concurrency = concurrency or int(os.environ.get('VIDEO_STATUS_POLL_CONCURRENCY', 20))
+        self.app = None
+        self._tasks: Dict[str, TrackedTask] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._model_estimates: Dict[str, Dict[str, int]] = {}
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['video_status_poller'] = self
+        app.before_request(self.start)
+
+    def start(self):
+        """Start the poll loop and resume renders that were in flight before the last restart"""
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, name='video-status-poller', daemon=True)
+
+        with self.app.app_context():
+            videos = GeneratedVideo.query.filter(
+                GeneratedVideo.generation_status == 'processing',
+                GeneratedVideo.pollo_task_id.isnot(None)
+            ).all()
+            for video in videos:
+                self.track(video)
+
+        self._thread.start()
+
+    def track(self, video: GeneratedVideo):
+        """Add a submitted render to the poll set; tracking the same video twice is a no-op"""
+        with self._lock:
+            if video.id in self._tasks:
+                return
+
+        estimate = self._estimate_for(video.model_used)
+        started = video.generation_started_at or datetime.utcnow()
+        submitted_at = time.time() - max((datetime.utcnow() - started).total_seconds(), 0)
+        task = TrackedTask(
+            video_id=video.id,
+            pollo_task_id=video.pollo_task_id,
+            bulk_job_id=video.bulk_job_id,
+            submitted_at=submitted_at,
+            min_seconds=estimate['min_seconds'],
+            max_seconds=estimate['max_seconds'],
+            last_state={'status': video.generation_status, 'progress': video.progress or 0}
+        )
+        task.next_poll_at = submitted_at + self._next_interval(task, submitted_at)
+
+        with self._lock:
+            self._tasks.setdefault(video.id, task)
+        self._wakeup.set()
+
+    def untrack(self, video_id: str):
+        """Stop polling a render whose outcome arrived by other means"""
+        with self._lock:
+            self._tasks.pop(video_id, None)
+
+    def tracked_count(self) -> int:
+        with self._lock:
+            return len(self._tasks)
+
+    def _estimate_for(self, model_id: str) -> Dict[str, int]:
+        if model_id not in self._model_estimates:
+            catalog = pollo_client.get_available_models().get('models', [])
+            for model in catalog:
+                self._model_estimates[model['id']] = parse_estimated_time(model.get('estimated_time'))
+        return self._model_estimates.get(model_id) or parse_estimated_time(None)
+
+    def _next_interval(self, task: TrackedTask, now: float) -> float:
+        elapsed = now - task.submitted_at
+        if elapsed < task.min_seconds:
+            # Halve the remaining gap to the earliest expected finish
+            return max(self.interval, (task.min_seconds - elapsed) / 2)
+        if elapsed <= task.max_seconds:
+            return self.interval
+        return min(self.interval * (2 ** task.overdue_polls), self.max_interval)
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            with self._lock:
+                due = [t for t in self._tasks.values() if t.next_poll_at <= now]
+                upcoming = [t.next_poll_at for t in self._tasks.values() if t.next_poll_at > now]
+
+            if due:
+                batches = [due[start:start + self.batch_size] for start in range(0, len(due), self.batch_size)]
+                with self.app.app_context():
+                    try:
+                        results = loop.run_until_complete(self._fetch_statuses(batches, now))
+                    except Exception as e:
+                        self.app.logger.error(f"Video status poll failed: {str(e)}")
+                        continue
+                    for tasks, statuses in zip(batches, results):
+                        try:
+                            self._apply_statuses(tasks, statuses)
+                        except Exception as e:
+                            db.session.rollback()
+                            self.app.logger.error(f"Video status poll failed: {str(e)}")
+            else:
+                self._wakeup.wait((min(upcoming) - now) if upcoming else None)
+
+    async def _fetch_statuses(self, batches: List[List[TrackedTask]], now: float) -> List[Dict[str, Any]]:
+        """Schedule each task's next poll, then fetch every batch concurrently"""
+        for tasks in batches:
+            for task in tasks:
+                if now - task.submitted_at > task.max_seconds:
+                    task.overdue_polls += 1
+                task.next_poll_at = now + self._next_interval(task, now)
+
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(tasks: List[TrackedTask]) -> Dict[str, Any]:
+            async with limit:
+                return await async_pollo_client.get_video_statuses([t.pollo_task_id for t in tasks])
+
+        return await asyncio.gather(*(fetch(tasks) for tasks in batches))
+
+    def _apply_statuses(self, tasks: List[TrackedTask], results: Dict[str, Any]):
+        changes = []
+        events = []
+        changed_tasks = []
+
+        for task in tasks:
+            result = results.get(task.pollo_task_id)
+            if not result or not result['success']:
+                continue
+
+            state = {'status': result['status'], 'progress': result.get('progress', 0)}
+            if state == task.last_state and state['status'] not in TERMINAL_STATUSES:
+                continue
+            task.last_state = state
+
+            row = {
+                'id': task.video_id,
+                'generation_status': state['status'],
+                'progress': state['progress']
+            }
+            if state['status'] in TERMINAL_STATUSES:
+                row['generation_completed_at'] = datetime.utcnow()
+                if result.get('video_url'):
+                    row['video_url'] = result['video_url']
+                if result.get('thumbnail_url'):
+                    row['thumbnail_url'] = result['thumbnail_url']
+                if state['status'] == 'failed':
+                    row['error_message'] = result.get('message') or result.get('error')
+            changes.append(row)
+            changed_tasks.append(task)
+
+            events.append({
+                'video_id': task.video_id,
+                'bulk_job_id': task.bulk_job_id,
+                'status': state['status'],
+                'progress': state['progress'],
+                'message': result.get('message', ''),
+                'video_url': result.get('video_url'),
+                'thumbnail_url': result.get('thumbnail_url')
+            })
+
+        if not changes:
+            return
+
+        # Persist before publishing so a subscriber that reads the DB after
+        # subscribing can never see an older state than the events it receives
+        published = []
+        try:
+            for row, event in zip(changes, events):
+                result = db.session.execute(
+                    update(GeneratedVideo).where(
+                        GeneratedVideo.id == row['id'],
+                        # A webhook may already have recorded the final result
+                        GeneratedVideo.generation_status.notin_(TERMINAL_STATUSES)
+                    ).values(
+                        **{k: v for k, v in row.items() if k != 'id'}
+                    )
+                )
+                if result.rowcount:
+                    published.append(event)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Nothing was saved: keep every task tracked and let the next poll apply it again
+            for task in changed_tasks:
+                task.last_state = None
+            raise
+
+        # Only stop polling once the terminal status is safely stored
+        for row in changes:
+            if row['generation_status'] in TERMINAL_STATUSES:
+                self.untrack(row['id'])
+
+        for event in published:
+            publish_video_event(event)
+
+# Global instance
+status_poller = StatusPoller()
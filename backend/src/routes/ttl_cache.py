@@ -0,0 +1,81 @@
+"""
+TTL Cache
+Small in-process cache with stale-while-revalidate refresh for slow-changing
+upstream data such as provider catalogs
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+class TTLCache:
+    """
+    Thread-safe TTL cache.
+
+    Entries younger than ``ttl`` are served as-is. Entries older than ``ttl``
+    but within ``ttl + stale_ttl`` are served immediately while a single
+    background thread refreshes them. Anything older is reloaded inline, and
+    concurrent callers for the same key wait on one load instead of each
+    calling upstream. A failed refresh keeps serving the stale value.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[Hashable, Tuple[Any, float]] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        entry = self._entries.get(key)
+        if entry:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < self.ttl:
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._refresh_in_background(key, loader)
+                return value
+
+        with self._key_lock(key):
+            # Another caller may have loaded it while we waited
+            entry = self._entries.get(key)
+            if entry and time.time() - entry[1] < self.ttl:
+                return entry[0]
+            return self._load(key, loader)
+
+    def invalidate(self, key: Hashable = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _key_lock(self, key: Hashable) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        value = loader()
+        with self._lock:
+            self._entries[key] = (value, time.time())
+        return value
+
+    def _refresh_in_background(self, key: Hashable, loader: Callable[[], Any]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                with self._key_lock(key):
+                    self._load(key, loader)
+            except Exception:
+                pass  # Keep serving the stale value; the next stale hit retries
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f'ttl-cache-refresh-{key}', daemon=True).start()
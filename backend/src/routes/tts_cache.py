@@ -0,0 +1,154 @@
+"""
+TTS Audio Cache
+Content-addressed store for synthesized speech under static/audio, so
+identical synthesis requests reuse one file instead of calling ElevenLabs
+again, with least-recently-used eviction to a size budget. Each file can
+carry a JSON sidecar (duration, waveform) that lives and dies with it
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_TTS_MODEL = 'eleven_monolingual_v1'
+
+def normalize_text(text: str) -> str:
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text or '')).strip()
+
+def tts_cache_key(voice_id: str, text: str, model_id: str = None,
+                  voice_settings: Optional[Dict[str, Any]] = None,
+                  previous_text: str = None, next_text: str = None) -> str:
+    """
+    Hash the inputs that determine the synthesized audio.
+
+    Text is Unicode-normalized and its whitespace collapsed; voice settings
+    are serialized with sorted keys so their order does not matter. The
+    surrounding text of a script segment changes its intonation, so it is
+    part of the key when given.
+    """
+    parts = [voice_id, model_id or DEFAULT_TTS_MODEL, normalize_text(text), voice_settings or {}]
+    if previous_text or next_text:
+        parts += [normalize_text(previous_text), normalize_text(next_text)]
+    key = json.dumps(parts, sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+class TTSCache:
+    """
+    LRU cache of ``tts_<key>.mp3`` files in ``directory``.
+
+    Recency is kept in memory and mirrored to file mtimes, so the order
+    survives restarts. Other ``tts_*.mp3`` files found in the directory
+    (from before the cache existed) count against the budget and are evicted
+    oldest first. Concurrent misses for the same key synthesize once: callers
+    hold ``lock_for(key)`` while checking and filling.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(64)]
+
+    def filename(self, key: str) -> str:
+        return f"tts_{key}.mp3"
+
+    def path(self, key: str) -> Path:
+        return self.directory / self.filename(key)
+
+    def metadata_path(self, key: str) -> Path:
+        return self.directory / f"tts_{key}.json"
+
+    def lock_for(self, key: str) -> threading.Lock:
+        return self._key_locks[int(key[:8], 16) % len(self._key_locks)]
+
+    def get(self, key: str) -> Optional[Path]:
+        """Path of the cached audio for ``key`` (marking it recently used), or None"""
+        path = self.path(key)
+        with self._lock:
+            self._ensure_loaded()
+            if path.name not in self._entries:
+                return None
+            if not path.exists():
+                # Removed behind our back
+                self._total_bytes -= self._entries.pop(path.name)
+                return None
+            self._entries.move_to_end(path.name)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, key: str, source: Path, metadata: Optional[Dict[str, Any]] = None) -> Path:
+        """Move a fully written file (and its metadata) into the cache under ``key`` and evict to the budget"""
+        path = self.path(key)
+        if metadata is not None:
+            self.set_metadata(key, metadata)
+        os.replace(source, path)
+        size = path.stat().st_size
+        with self._lock:
+            self._ensure_loaded()
+            self._total_bytes += size - self._entries.pop(path.name, 0)
+            self._entries[path.name] = size
+            self._evict()
+        return path
+
+    def metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        """Sidecar metadata stored with ``key``'s audio, or None"""
+        try:
+            with open(self.metadata_path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set_metadata(self, key: str, metadata: Dict[str, Any]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        partial = self.directory / f".{key}.{uuid.uuid4().hex}.json"
+        with open(partial, 'w') as f:
+            json.dump(metadata, f)
+        os.replace(partial, self.metadata_path(key))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._ensure_loaded()
+            return {
+                'files': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+    def _ensure_loaded(self):
+        """Index existing files by mtime on first use (caller holds _lock)"""
+        if self._loaded:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = []
+        for path in self.directory.glob('tts_*.mp3'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total_bytes += size
+        self._loaded = True
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used files until under budget, always keeping the newest (caller holds _lock)"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            (self.directory / name).unlink(missing_ok=True)
+            (self.directory / name).with_suffix('.json').unlink(missing_ok=True)
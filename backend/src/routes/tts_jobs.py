@@ -0,0 +1,186 @@
+"""
+TTS Job Queue
+Runs speech synthesis on a background worker pool so a long script does
+not hold a web worker: requests persist a queued VoiceGenerationJob and
+return its ID, and clients poll or stream the job's status
+"""
+
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, update
+
+from src.models.user import db
+from src.models.voice import VoiceGenerationJob
+from .video_events import EventBroker
+
+TERMINAL_JOB_STATUSES = {'completed', 'failed'}
+
+# Producer signature: (request data, on_progress) -> (audio file, cache hit, segment count)
+Producer = Callable[[Dict[str, Any], Optional[Callable[[Dict[str, Any]], None]]], Tuple[Any, bool, int]]
+
+def tts_job_topic(job_id: str) -> str:
+    return f"tts_job:{job_id}"
+
+# Status changes of synthesis jobs, consumed by the job SSE endpoint
+tts_job_events = EventBroker()
+
+class TTSJobQueue:
+    """
+    Durable queue of VoiceGenerationJob rows.
+
+    As with VideoJobQueue the database is the source of truth: the in-memory
+    queue only holds job IDs, and queued jobs are picked up again when the
+    process starts. ``producer`` does the actual synthesis
+    (voices.produce_audio), so segmented scripts report per-segment
+    progress on the job.
+
+    A worker claims a job with a lease that every finished segment renews.
+    A 'processing' job is only rerun once its lease has expired, so a
+    restart, or a second process, never synthesizes (and bills) a job
+    another worker is still running. ``job_lease`` must outlast the
+    slowest segment.
+    """
+
+    def __init__(self, producer: Producer, num_workers: int = None, job_lease_seconds: int = None):
+        self.producer = producer
+        self.num_workers = num_workers or int(os.environ.get('TTS_JOB_WORKERS', 4))
+        self.job_lease = timedelta(
+            seconds=job_lease_seconds or int(os.environ.get('TTS_JOB_LEASE_SECONDS', 600))
+        )
+        self.app = None
+        self._queue = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._started = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Bind the queue to the Flask app; workers start with the first request"""
+        self.app = app
+        app.extensions['tts_job_queue'] = self
+        app.before_request(self.start)
+
+    def start(self):
+        """Start the worker pool and recover jobs left over from the last run"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        self._requeue_pending()
+
+        for index in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f'tts-job-worker-{index}',
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+        threading.Thread(target=self._lease_loop, name='tts-job-lease-reaper', daemon=True).start()
+
+    def enqueue(self, job_id: str):
+        """Schedule a committed 'queued' VoiceGenerationJob"""
+        self.start()
+        self._queue.put(job_id)
+
+    def pending_count(self) -> int:
+        return self._queue.qsize()
+
+    def _requeue_pending(self):
+        with self.app.app_context():
+            self._reclaim_expired_jobs()
+            queued = db.session.query(VoiceGenerationJob.id).filter(
+                VoiceGenerationJob.status == 'queued'
+            ).order_by(VoiceGenerationJob.created_at.asc()).all()
+            for (job_id,) in queued:
+                self._queue.put(job_id)
+
+    def _lease_loop(self):
+        # A process that died mid-synthesis leaves its claim behind; rerun it once the lease runs out
+        while True:
+            time.sleep(self.job_lease.total_seconds() / 2)
+            try:
+                with self.app.app_context():
+                    for job_id in self._reclaim_expired_jobs():
+                        self._queue.put(job_id)
+            except Exception as e:
+                self.app.logger.error(f"Reclaiming expired TTS jobs failed: {str(e)}")
+
+    def _reclaim_expired_jobs(self) -> List[str]:
+        """Return 'processing' jobs whose lease has expired to 'queued'"""
+        expired = or_(
+            VoiceGenerationJob.claimed_at.is_(None),
+            VoiceGenerationJob.claimed_at < datetime.utcnow() - self.job_lease
+        )
+        job_ids = [
+            job_id for (job_id,) in db.session.query(VoiceGenerationJob.id).filter(
+                VoiceGenerationJob.status == 'processing', expired
+            )
+        ]
+        if job_ids:
+            db.session.execute(
+                update(VoiceGenerationJob).where(
+                    VoiceGenerationJob.id.in_(job_ids),
+                    VoiceGenerationJob.status == 'processing',
+                    expired
+                ).values(status='queued', segments_completed=0, claimed_at=None)
+            )
+        db.session.commit()
+        return job_ids
+
+    def _worker_loop(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                with self.app.app_context():
+                    self._process(job_id)
+            except Exception as e:
+                self.app.logger.error(f"TTS job {job_id} crashed: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _process(self, job_id: str):
+        # Claim the row atomically so a job enqueued twice runs once
+        claimed = db.session.execute(
+            update(VoiceGenerationJob).where(
+                VoiceGenerationJob.id == job_id,
+                VoiceGenerationJob.status == 'queued'
+            ).values(status='processing', started_at=datetime.utcnow(), claimed_at=datetime.utcnow())
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return
+
+        job = VoiceGenerationJob.query.get(job_id)
+        self._publish(job)
+
+        def on_progress(event: Dict[str, Any]):
+            job.segments_total = event['total']
+            job.segments_completed = event['completed']
+            job.claimed_at = datetime.utcnow()
+            db.session.commit()
+            self._publish(job, segment=event['segment'], segment_cached=event['cached'])
+
+        try:
+            audio_path, cached, segments = self.producer(job.params or {}, on_progress)
+            job.status = 'completed'
+            job.audio_url = f"/audio/{audio_path.name}"
+            job.cached = cached
+            job.segments_total = segments
+            job.segments_completed = segments
+        except Exception as e:
+            db.session.rollback()
+            job.status = 'failed'
+            job.error_message = str(e)
+        job.completed_at = datetime.utcnow()
+        db.session.commit()
+        self._publish(job)
+
+    def _publish(self, job: VoiceGenerationJob, **extra):
+        tts_job_events.publish(tts_job_topic(job.id), {**job.to_dict(), **extra})
@@ -0,0 +1,145 @@
+"""
+Segmented TTS Synthesis
+Splits long scripts at sentence boundaries, synthesizes the segments in
+parallel within a per-API-key concurrency limit and joins the MP3 audio
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SEGMENT_MAX_CHARS = int(os.environ.get('TTS_SEGMENT_MAX_CHARS', 800))
+# ElevenLabs limits concurrent requests per account; shared by every request using the key
+KEY_MAX_CONCURRENCY = int(os.environ.get('ELEVENLABS_MAX_CONCURRENCY', 4))
+
+# Terminal punctuation plus any closing quotes/brackets, or a blank line
+_SENTENCE_END = re.compile(r'[.!?…。！？]+["\'”’)\]]*(?=\s|$)|\n\s*\n')
+_CLAUSE_END = re.compile(r'(?<=[,;:—])\s+')
+
+class SynthesisError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+def split_script(text: str, max_chars: int = SEGMENT_MAX_CHARS) -> List[str]:
+    """
+    Split ``text`` into segments of at most ``max_chars``, breaking only at
+    sentence boundaries where possible. Consecutive short sentences are
+    packed together so segments stay close to the limit; a single sentence
+    longer than the limit is broken at clause punctuation, then at spaces.
+    """
+    text = text or ''
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        sentences.append(text[start:match.end()].strip())
+        start = match.end()
+    sentences.append(text[start:].strip())
+
+    pieces = []
+    for sentence in filter(None, sentences):
+        pieces.extend(_split_long(sentence, max_chars))
+
+    segments = []
+    current = ''
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > max_chars:
+            segments.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        segments.append(current)
+    return segments
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    if len(sentence) <= max_chars:
+        return [sentence]
+
+    parts = []
+    current = ''
+    for clause in _CLAUSE_END.split(sentence):
+        for word in ([clause] if len(clause) <= max_chars else clause.split(' ')):
+            if current and len(current) + 1 + len(word) > max_chars:
+                parts.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+    if current:
+        parts.append(current)
+    return parts
+
+def strip_id3(audio: bytes) -> bytes:
+    """Drop ID3v2 headers and ID3v1 trailers so MP3 segments concatenate into one clean stream"""
+    if audio[:3] == b'ID3' and len(audio) >= 10:
+        # Tag size is a 28-bit syncsafe integer, excluding the 10-byte header
+        size = (audio[6] << 21) | (audio[7] << 14) | (audio[8] << 7) | audio[9]
+        footer = 10 if audio[5] & 0x10 else 0
+        audio = audio[10 + size + footer:]
+    if len(audio) >= 128 and audio[-128:-125] == b'TAG':
+        audio = audio[:-128]
+    return audio
+
+_key_slots: Dict[str, threading.BoundedSemaphore] = {}
+_key_slots_lock = threading.Lock()
+
+def key_slots(api_key: str) -> threading.BoundedSemaphore:
+    """Semaphore bounding in-flight synthesis calls for one API key across all requests"""
+    with _key_slots_lock:
+        slots = _key_slots.get(api_key)
+        if slots is None:
+            slots = threading.BoundedSemaphore(KEY_MAX_CONCURRENCY)
+            _key_slots[api_key] = slots
+        return slots
+
+def synthesize_segments(data: Dict[str, Any], segments: List[str],
+                        synthesize: Callable[[Dict[str, Any]], Tuple[bytes, bool]],
+                        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> bytes:
+    """
+    Synthesize ``segments`` in parallel and return the joined MP3.
+
+    ``synthesize`` takes the request ``data`` for one segment and returns
+    (audio bytes, served from cache); it should hold key_slots() around
+    upstream calls so parallel segments respect the account limit. Each
+    segment request carries its neighbours as previous_text/next_text so
+    intonation flows across the joins. ``on_progress`` is called as each
+    segment finishes.
+    """
+    total = len(segments)
+    results: List[Optional[bytes]] = [None] * total
+    completed = 0
+
+    def run(index: int) -> Tuple[int, bool]:
+        segment_data = {
+            **data,
+            'text': segments[index],
+            'previous_text': segments[index - 1] if index > 0 else None,
+            'next_text': segments[index + 1] if index + 1 < total else None
+        }
+        audio, cached = synthesize(segment_data)
+        results[index] = strip_id3(audio)
+        return index, cached
+
+    with ThreadPoolExecutor(max_workers=min(total, KEY_MAX_CONCURRENCY),
+                            thread_name_prefix='tts-segment') as executor:
+        futures = [executor.submit(run, index) for index in range(total)]
+        try:
+            for future in as_completed(futures):
+                index, cached = future.result()
+                completed += 1
+                if on_progress:
+                    on_progress({
+                        'segment': index,
+                        'total': total,
+                        'completed': completed,
+                        'cached': cached,
+                        'characters': len(segments[index])
+                    })
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+    return b''.join(results)
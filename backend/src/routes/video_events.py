@@ -0,0 +1,85 @@
+"""
+Video Event Broker
+In-process publish/subscribe for generation status changes, consumed by the
+Server-Sent Events endpoints
+"""
+
+import json
+import queue
+import threading
+from typing import Any, Dict, Set
+
+TERMINAL_STATUSES = {'completed', 'failed'}
+
+# Every render that reaches a terminal status is also published here
+COMPLETION_TOPIC = 'videos:completed'
+
+def video_topic(video_id: str) -> str:
+    return f"video:{video_id}"
+
+def bulk_topic(bulk_job_id: str) -> str:
+    return f"bulk:{bulk_job_id}"
+
+def format_sse(event: Dict[str, Any], event_name: str = 'status') -> str:
+    """Serialize an event as a Server-Sent Events frame"""
+    return f"event: {event_name}\ndata: {json.dumps(event)}\n\n"
+
+class EventBroker:
+    """
+    Fan out status events to any number of subscribers per topic.
+
+    Each subscriber owns a bounded queue; a slow client drops its oldest
+    events instead of blocking the publisher.
+    """
+
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[str, Set[queue.Queue]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, *topics: str, maxsize: int = None) -> queue.Queue:
+        """Register a queue for ``topics``; pass maxsize=0 for an unbounded, lossless queue"""
+        subscriber = queue.Queue(maxsize=self.max_queue_size if maxsize is None else maxsize)
+        with self._lock:
+            for topic in topics:
+                self._subscribers.setdefault(topic, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue, *topics: str):
+        with self._lock:
+            for topic in topics:
+                subscribers = self._subscribers.get(topic)
+                if not subscribers:
+                    continue
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    def publish(self, topic: str, event: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+                subscriber.put_nowait(event)
+
+    def subscriber_count(self, topic: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(topic, ()))
+
+# Global instance
+video_events = EventBroker()
+
+def publish_video_event(event: Dict[str, Any]):
+    """Publish a video status event to its video, bulk job and completion topics"""
+    video_events.publish(video_topic(event['video_id']), event)
+    if event.get('bulk_job_id'):
+        video_events.publish(bulk_topic(event['bulk_job_id']), event)
+    if event['status'] in TERMINAL_STATUSES:
+        video_events.publish(COMPLETION_TOPIC, event)
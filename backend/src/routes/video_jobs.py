@@ -0,0 +1,256 @@
+"""
+Video Generation Job Queue
+Runs Pollo AI submissions on a dedicated worker pool so API requests only
+persist a queued GeneratedVideo row and return immediately
+"""
+
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import or_, update
+
+from src.models.user import db, User
+from src.models.video import GeneratedVideo
+from .generation_scheduler import GenerationScheduler, job_priority
+from .pollo_integration import pollo_client
+from .status_poller import status_poller
+from .video_events import publish_video_event
+
+def request_fingerprint(script: str, model_id: str, actor_id: str, voice_id: str,
+                        duration, aspect_ratio: str, quality: str) -> str:
+    """
+    Hash the inputs that determine a render's output.
+
+    The script is Unicode-normalized and its whitespace collapsed, so
+    resubmitting the same text with different spacing still matches.
+    """
+    normalized_script = re.sub(r'\s+', ' ', unicodedata.normalize('NFC', script or '')).strip()
+    key = json.dumps([
+        normalized_script, model_id, actor_id, voice_id,
+        int(duration or 0), aspect_ratio, quality
+    ])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+class VideoJobQueue:
+    """
+    Durable job queue for video generation.
+
+    The database is the source of truth: every job is a GeneratedVideo row
+    with status 'queued' and its submission payload in ``generation_params``.
+    The in-memory queues only hold row IDs, and any rows still queued when the
+    process starts are picked up again, so accepted jobs survive restarts.
+
+    Jobs wait in the GenerationScheduler until their model has capacity and
+    are then handed to the worker pool in subscription-priority order.
+
+    A worker claims a row by moving it to 'submitting' with a lease
+    timestamp. Claims are only retried once the lease has expired, so a
+    restart, or a second process, never resubmits (and double-charges) a
+    video another worker is still sending to Pollo. ``submit_lease`` must
+    outlast the longest submission, failover attempts included.
+    """
+
+    def __init__(self, num_workers: int = None, scheduler: GenerationScheduler = None,
+                 submit_lease_seconds: int = None):
+        self.num_workers = num_workers or int(os.environ.get('VIDEO_JOB_WORKERS', 8))
+        self.scheduler = scheduler or GenerationScheduler()
+        self.submit_lease = timedelta(
+            seconds=submit_lease_seconds or int(os.environ.get('VIDEO_SUBMIT_LEASE_SECONDS', 900))
+        )
+        self.app = None
+        self._queue = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._started = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Bind the queue to the Flask app; workers start with the first request"""
+        self.app = app
+        app.extensions['video_job_queue'] = self
+        # Starting lazily keeps the debug reloader's parent process from
+        # running a second set of workers against the same database.
+        app.before_request(self.start)
+
+    def start(self):
+        """Start the worker pool and recover jobs queued before the last restart"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        self._requeue_pending()
+        self.scheduler.start(self._queue.put)
+
+        for index in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f'video-job-worker-{index}',
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+        threading.Thread(target=self._lease_loop, name='video-job-lease-reaper', daemon=True).start()
+
+    def enqueue(self, video_id: str, model_id: str, priority: int):
+        """Schedule a committed 'queued' GeneratedVideo row for submission"""
+        self.start()
+        self.scheduler.submit(video_id, model_id, priority)
+
+    def enqueue_many(self, jobs: Iterable[Tuple[str, str]], priority: int):
+        """Schedule a batch of committed (video_id, model_id) rows for submission"""
+        self.start()
+        for video_id, model_id in jobs:
+            self.scheduler.submit(video_id, model_id, priority)
+
+    def pending_count(self) -> int:
+        """Number of jobs released by the scheduler and waiting for a free worker"""
+        return self._queue.qsize()
+
+    def _requeue_pending(self):
+        with self.app.app_context():
+            # Renders already upstream still count against their model's ceiling
+            in_flight = db.session.query(GeneratedVideo.id, GeneratedVideo.model_used).filter(
+                GeneratedVideo.generation_status == 'processing'
+            ).all()
+            for video_id, model_id in in_flight:
+                self.scheduler.mark_active(video_id, model_id)
+
+            self._reclaim_expired_submissions()
+            self._schedule_queued()
+
+    def _lease_loop(self):
+        # A process that died mid-submission leaves its claim behind; retry it once the lease runs out
+        while True:
+            time.sleep(self.submit_lease.total_seconds() / 2)
+            try:
+                with self.app.app_context():
+                    reclaimed = self._reclaim_expired_submissions()
+                    if reclaimed:
+                        self._schedule_queued(reclaimed)
+            except Exception as e:
+                self.app.logger.error(f"Reclaiming expired video submissions failed: {str(e)}")
+
+    def _reclaim_expired_submissions(self) -> List[str]:
+        """Return 'submitting' rows whose lease has expired to 'queued' (at-least-once)"""
+        expired = or_(
+            GeneratedVideo.submission_claimed_at.is_(None),
+            GeneratedVideo.submission_claimed_at < datetime.utcnow() - self.submit_lease
+        )
+        video_ids = [
+            video_id for (video_id,) in db.session.query(GeneratedVideo.id).filter(
+                GeneratedVideo.generation_status == 'submitting', expired
+            )
+        ]
+        if video_ids:
+            db.session.execute(
+                update(GeneratedVideo).where(
+                    GeneratedVideo.id.in_(video_ids),
+                    GeneratedVideo.generation_status == 'submitting',
+                    expired
+                ).values(generation_status='queued', submission_claimed_at=None)
+            )
+        db.session.commit()
+        return video_ids
+
+    def _schedule_queued(self, video_ids: Optional[List[str]] = None):
+        query = db.session.query(GeneratedVideo, User).join(
+            User, User.id == GeneratedVideo.user_id
+        ).filter(
+            GeneratedVideo.generation_status == 'queued'
+        )
+        if video_ids is not None:
+            query = query.filter(GeneratedVideo.id.in_(video_ids))
+
+        priorities = {}
+        for video, user in query.order_by(GeneratedVideo.created_at.asc()).all():
+            if user.id not in priorities:
+                priorities[user.id] = job_priority(user)
+            self.scheduler.submit(video.id, video.model_used, priorities[user.id])
+
+    def _worker_loop(self):
+        while True:
+            video_id = self._queue.get()
+            try:
+                with self.app.app_context():
+                    self._process(video_id)
+            except Exception as e:
+                self.app.logger.error(f"Video job {video_id} crashed: {str(e)}")
+                self.scheduler.release(video_id)
+            finally:
+                self._queue.task_done()
+
+    def _process(self, video_id: str):
+        # Claim the row atomically so a job scheduled twice is submitted once
+        claimed = db.session.execute(
+            update(GeneratedVideo).where(
+                GeneratedVideo.id == video_id,
+                GeneratedVideo.generation_status == 'queued'
+            ).values(generation_status='submitting', submission_claimed_at=datetime.utcnow())
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            self.scheduler.release(video_id)
+            return
+
+        video = GeneratedVideo.query.get(video_id)
+        params = video.generation_params or {}
+        try:
+            result = pollo_client.generate_video(
+                prompt=params.get('script', ''),
+                model_id=video.model_used,
+                duration=video.duration_seconds or 5,
+                aspect_ratio=params.get('aspect_ratio', '16:9'),
+                quality=params.get('quality', 'high'),
+                allow_fallback=params.get('allow_model_fallback', False)
+            )
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+
+        if result['success']:
+            if result['model_id'] != video.model_used:
+                # Rerouted by failover; keep the requested model for reference
+                video.generation_params = {**params, 'fallback_from': video.model_used}
+                self.scheduler.reassign(video.id, result['model_id'])
+                video.model_used = result['model_id']
+            video.pollo_task_id = result['video_id']
+            video.ai_service_used = 'pollo'
+            video.generation_status = 'processing'
+        else:
+            video.generation_status = 'failed'
+            video.error_message = result.get('error', 'Failed to start video generation')
+            if video.credits_used:
+                # Nothing was rendered, so give back what the request was charged
+                db.session.execute(
+                    update(User).where(User.id == video.user_id).values(
+                        credits_remaining=User.credits_remaining + video.credits_used
+                    )
+                )
+                video.credits_used = 0
+
+        db.session.commit()
+
+        event = {
+            'video_id': video.id,
+            'bulk_job_id': video.bulk_job_id,
+            'status': video.generation_status,
+            'progress': 0,
+            'message': video.error_message or 'Video generation started successfully',
+            'video_url': None,
+            'thumbnail_url': None
+        }
+        publish_video_event(event)
+
+        if video.pollo_task_id:
+            status_poller.track(video)
+
+# Global instance
+video_job_queue = VideoJobQueue()
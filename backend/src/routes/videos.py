@@ -1,19 +1,53 @@
-from flask import Blueprint, request, jsonify
-from datetime import datetime
+from flask import Blueprint, request, jsonify, Response
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update, and_, or_
 import requests
 import os
+import hmac
+import hashlib
+import queue
+import threading
 import uuid
 from src.models.user import User, db
 from src.models.project import Project
 from src.models.video import GeneratedVideo
 from src.routes.auth import verify_token
-from .pollo_integration import pollo_client
+from .pollo_integration import pollo_client, parse_estimated_time
+from .video_jobs import video_job_queue, request_fingerprint
+from .generation_scheduler import job_priority
+from .status_poller import status_poller
+from .video_events import (video_events, video_topic, bulk_topic, format_sse,
+                           publish_video_event, TERMINAL_STATUSES)
 
 videos_bp = Blueprint('videos', __name__)
 
 # Pollo AI configuration
 POLLO_API_KEY = os.environ.get('POLLO_API_KEY', 'your-pollo-api-key')
 POLLO_API_BASE = 'https://api.pollo.ai/v1'
+POLLO_WEBHOOK_SECRET = os.environ.get('POLLO_WEBHOOK_SECRET')
+MODELS_CACHE_MAX_AGE = int(os.environ.get('POLLO_MODELS_MAX_AGE', 300))
+
+# Completed renders younger than this are reused for identical requests
+DEDUP_WINDOW_SECONDS = int(os.environ.get('VIDEO_DEDUP_WINDOW_SECONDS', 600))
+# Striped locks serialize the lookup-then-insert for identical fingerprints
+_FINGERPRINT_LOCKS = [threading.Lock() for _ in range(64)]
+
+# Bulk requests: upper bound on variations, and credits charged per variation
+# (refunded if the variation fails before reaching Pollo AI)
+# Submission is throttled per model by the job queue's scheduler, so the cap only
+# bounds the size of one request
+BULK_MAX_VARIATIONS = int(os.environ.get('VIDEO_BULK_MAX_VARIATIONS', 200))
+BULK_CREDITS_PER_VIDEO = 10
+
+def parse_duration(value):
+    """Seconds from a request's duration field; None unless it is a positive whole number"""
+    if isinstance(value, bool):
+        return None
+    try:
+        seconds = int(value)
+    except (TypeError, ValueError):
+        return None
+    return seconds if seconds > 0 else None
 
 def get_current_user_from_token():
     """Helper function to get current user from JWT token"""
@@ -29,6 +63,96 @@ def get_current_user_from_token():
     
     return User.query.get(user_id)
 
+def get_current_user_from_token_or_query():
+    """Like get_current_user_from_token, but also accepts ?token= for EventSource clients"""
+    user = get_current_user_from_token()
+    if user:
+        return user
+
+    user_id = verify_token(request.args.get('token', ''))
+    return User.query.get(user_id) if user_id else None
+
+def video_event_snapshot(video):
+    """Current status of a video in the shape published on the event stream"""
+    return {
+        'video_id': video.id,
+        'bulk_job_id': video.bulk_job_id,
+        'status': video.generation_status,
+        'progress': video.progress or 0,
+        'message': video.error_message or '',
+        'video_url': video.video_url,
+        'thumbnail_url': video.thumbnail_url
+    }
+
+def stream_video_events(topic, videos, keepalive_seconds=15):
+    """
+    Build an SSE response that replays the current status of each video, then
+    streams published events until every video reaches a terminal status.
+    """
+    # Subscribe before taking snapshots so no transition can fall in between
+    subscriber = video_events.subscribe(topic)
+    for video in videos:
+        db.session.refresh(video)
+    snapshots = [video_event_snapshot(video) for video in videos]
+    pending = {s['video_id'] for s in snapshots if s['status'] not in TERMINAL_STATUSES}
+
+    def generate():
+        for snapshot in snapshots:
+            yield format_sse(snapshot)
+
+        while pending:
+            try:
+                event = subscriber.get(timeout=keepalive_seconds)
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+
+            yield format_sse(event)
+            if event['status'] in TERMINAL_STATUSES:
+                pending.discard(event['video_id'])
+
+        yield format_sse({'topic': topic}, event_name='done')
+
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Runs on normal completion and when the client disconnects mid-stream
+    response.call_on_close(lambda: video_events.unsubscribe(subscriber, topic))
+    return response
+
+def find_duplicate_video(user_id, fingerprint):
+    """Return an in-flight or recently completed video with the same fingerprint"""
+    recent = datetime.utcnow() - timedelta(seconds=DEDUP_WINDOW_SECONDS)
+    return GeneratedVideo.query.filter(
+        GeneratedVideo.user_id == user_id,
+        GeneratedVideo.request_fingerprint == fingerprint,
+        or_(
+            GeneratedVideo.generation_status.in_(['queued', 'submitting', 'processing']),
+            and_(
+                GeneratedVideo.generation_status == 'completed',
+                GeneratedVideo.generation_completed_at >= recent
+            )
+        )
+    ).order_by(GeneratedVideo.created_at.desc()).first()
+
+def get_or_create_project(user, project_id=None, script=''):
+    """Resolve the project a video belongs to, defaulting to the user's quick-generation project"""
+    if project_id:
+        return Project.query.filter_by(id=project_id, user_id=user.id).first()
+
+    project = Project.query.filter_by(user_id=user.id, name='Quick Generations').first()
+    if not project:
+        project = Project(
+            user_id=user.id,
+            name='Quick Generations',
+            description='Videos generated outside of a project',
+            script_content=script
+        )
+        db.session.add(project)
+        db.session.flush()
+    return project
+
 @videos_bp.route('/models', methods=['GET'])
 def get_available_models():
     """Get available video generation models from Pollo AI"""
@@ -36,12 +160,20 @@ def get_available_models():
         result = pollo_client.get_available_models()
         
         if result['success']:
-            return jsonify({
-                'success': True,
-                'data': {
-                    'models': result['models']
-                }
-            }), 200
+            # Clients that already hold this catalog version skip the body
+            if result['etag'] in request.if_none_match:
+                response = Response(status=304)
+            else:
+                response = jsonify({
+                    'success': True,
+                    'data': {
+                        'models': result['models']
+                    }
+                })
+            response.set_etag(result['etag'])
+            response.cache_control.public = True
+            response.cache_control.max_age = MODELS_CACHE_MAX_AGE
+            return response
         else:
             return jsonify({
                 'success': False,
@@ -62,8 +194,15 @@ def get_available_models():
 
 @videos_bp.route('/generate', methods=['POST'])
 def generate_video():
-    """Generate video using Pollo AI"""
+    """Queue a video for generation with Pollo AI"""
     try:
+        user = get_current_user_from_token()
+        if not user:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid or missing authorization token'
+            }), 401
+
         data = request.get_json()
         
         # Validate required fields
@@ -80,38 +219,77 @@ def generate_video():
         model_id = data['model_id']
         actor_id = data['actor_id']
         voice_id = data['voice_id']
-        duration = data['duration']
         settings = data.get('settings', {})
-        
-        # Create video record
-        video_id = str(uuid.uuid4())
-        
-        # Generate video using Pollo AI
-        result = pollo_client.generate_video(
-            prompt=script,
-            model_id=model_id,
-            duration=duration,
-            aspect_ratio=settings.get('aspect_ratio', '16:9'),
-            quality=settings.get('quality', 'high')
-        )
-        
-        if result['success']:
-            return jsonify({
-                'success': True,
-                'data': {
-                    'video_id': video_id,
-                    'pollo_video_id': result['video_id'],
-                    'status': 'processing',
-                    'message': 'Video generation started successfully'
-                }
-            })
-        else:
+
+        duration = parse_duration(data['duration'])
+        if duration is None:
             return jsonify({
                 'success': False,
-                'message': result.get('error', 'Failed to start video generation')
-            }), 500
+                'message': 'duration must be a positive number of seconds'
+            }), 400
+
+        aspect_ratio = settings.get('aspect_ratio', '16:9')
+        quality = settings.get('quality', 'high')
+        fingerprint = request_fingerprint(script, model_id, actor_id, voice_id,
+                                          duration, aspect_ratio, quality)
+
+        with _FINGERPRINT_LOCKS[int(fingerprint[:8], 16) % len(_FINGERPRINT_LOCKS)]:
+            # Double-clicks and resubmits attach to the existing render
+            existing = find_duplicate_video(user.id, fingerprint)
+            if existing:
+                return jsonify({
+                    'success': True,
+                    'data': {
+                        'video_id': existing.id,
+                        'status': existing.generation_status,
+                        'deduplicated': True,
+                        'message': 'An identical video was generated recently'
+                                   if existing.generation_status == 'completed'
+                                   else 'An identical video is already being generated'
+                    }
+                }), 200
+
+            project = get_or_create_project(user, data.get('project_id'), script)
+            if not project:
+                return jsonify({
+                    'success': False,
+                    'message': 'Project not found'
+                }), 404
+
+            # Persist the job; a queue worker submits it to Pollo AI
+            video = GeneratedVideo(
+                project_id=project.id,
+                user_id=user.id,
+                actor_id=actor_id,
+                voice_id=voice_id,
+                model_used=model_id,
+                duration_seconds=duration,
+                generation_status='queued',
+                generation_started_at=datetime.utcnow(),
+                request_fingerprint=fingerprint,
+                generation_params={
+                    'script': script,
+                    'aspect_ratio': aspect_ratio,
+                    'quality': quality,
+                    'allow_model_fallback': bool(settings.get('allow_model_fallback', False))
+                }
+            )
+            db.session.add(video)
+            db.session.commit()
+
+        video_job_queue.enqueue(video.id, model_id, job_priority(user))
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'video_id': video.id,
+                'status': 'queued',
+                'message': 'Video generation queued successfully'
+            }
+        }), 202
             
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'success': False,
             'message': str(e)
@@ -121,29 +299,41 @@ def generate_video():
 def get_video_status(video_id):
     """Get video generation status"""
     try:
-        # For demo, extract pollo_video_id from video_id
-        # In production, you'd look this up in the database
-        pollo_video_id = f"video_{int(datetime.utcnow().timestamp())}"
-        
-        result = pollo_client.get_video_status(pollo_video_id)
-        
-        if result['success']:
+        user = get_current_user_from_token()
+        if not user:
             return jsonify({
-                'success': True,
-                'data': {
-                    'video_id': video_id,
-                    'status': result['status'],
-                    'progress': result.get('progress', 0),
-                    'message': result.get('message', ''),
-                    'video_url': result.get('video_url'),
-                    'thumbnail_url': result.get('thumbnail_url')
-                }
-            })
-        else:
+                'success': False,
+                'message': 'Invalid or missing authorization token'
+            }), 401
+
+        video = GeneratedVideo.query.filter_by(id=video_id, user_id=user.id).first()
+        if not video:
             return jsonify({
                 'success': False,
-                'message': result.get('error', 'Failed to get video status')
-            }), 500
+                'message': 'Video not found'
+            }), 404
+
+        # The status poller keeps the row current, so this never calls Pollo AI
+        if video.generation_status in ('queued', 'submitting'):
+            message = 'Waiting for an available generation worker'
+        elif video.generation_status == 'processing':
+            message = f"Generating video... {video.progress or 0}% complete"
+        elif video.generation_status == 'completed':
+            message = 'Video generation completed successfully'
+        else:
+            message = video.error_message or ''
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'video_id': video_id,
+                'status': video.generation_status,
+                'progress': video.progress or 0,
+                'message': message,
+                'video_url': video.video_url,
+                'thumbnail_url': video.thumbnail_url
+            }
+        })
             
     except Exception as e:
         return jsonify({
@@ -151,15 +341,54 @@ def get_video_status(video_id):
             'message': str(e)
         }), 500
 
+@videos_bp.route('/<video_id>/events', methods=['GET'])
+def stream_video_status(video_id):
+    """Stream status and progress changes for one video as Server-Sent Events"""
+    try:
+        user = get_current_user_from_token_or_query()
+        if not user:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid or missing authorization token'
+            }), 401
+
+        video = GeneratedVideo.query.filter_by(id=video_id, user_id=user.id).first()
+        if not video:
+            return jsonify({
+                'success': False,
+                'message': 'Video not found'
+            }), 404
+
+        if video.pollo_task_id and video.generation_status not in TERMINAL_STATUSES:
+            status_poller.track(video)
+
+        return stream_video_events(video_topic(video.id), [video])
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
 @videos_bp.route('/<video_id>', methods=['GET'])
 def get_video_result(video_id):
     """Get completed video result"""
     try:
-        # For demo, extract pollo_video_id from video_id
-        # In production, you'd look this up in the database
-        pollo_video_id = f"video_{int(datetime.utcnow().timestamp())}"
-        
-        result = pollo_client.get_video_result(pollo_video_id)
+        user = get_current_user_from_token()
+        if not user:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid or missing authorization token'
+            }), 401
+
+        video = GeneratedVideo.query.filter_by(id=video_id, user_id=user.id).first()
+        if not video or not video.pollo_task_id:
+            return jsonify({
+                'success': False,
+                'message': 'Video not found'
+            }), 404
+
+        result = pollo_client.get_video_result(video.pollo_task_id)
         
         if result['success']:
             return jsonify({
@@ -228,7 +457,63 @@ def bulk_generate_videos():
             }), 404
         
         variations = data['variations']
-        total_credits = len(variations) * 10  # Mock calculation
+        if not isinstance(variations, list) or not all(isinstance(v, dict) for v in variations):
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'INVALID_VARIATIONS',
+                    'message': 'variations must be a list of objects'
+                }
+            }), 400
+        if len(variations) > BULK_MAX_VARIATIONS:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'TOO_MANY_VARIATIONS',
+                    'message': f'At most {BULK_MAX_VARIATIONS} variations can be generated at once'
+                }
+            }), 400
+
+        settings = data.get('settings', {})
+        if not isinstance(settings, dict) or not all(isinstance(v.get('settings', {}), dict) for v in variations):
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'INVALID_SETTINGS',
+                    'message': 'settings must be an object'
+                }
+            }), 400
+        if not all(isinstance(v.get('model', 'kling-1.6'), str) for v in variations):
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'INVALID_MODEL',
+                    'message': 'model must be a string'
+                }
+            }), 400
+
+        durations = [parse_duration(v.get('duration', data.get('duration', 5))) for v in variations]
+        if None in durations:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'INVALID_DURATION',
+                    'message': 'duration must be a positive number of seconds'
+                }
+            }), 400
+
+        known_models = video_job_queue.scheduler.limits
+        unknown_models = sorted({v.get('model', 'kling-1.6') for v in variations} - set(known_models))
+        if unknown_models:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'UNKNOWN_MODEL',
+                    'message': f"Unknown model: {', '.join(unknown_models)}"
+                }
+            }), 400
+
+        total_credits = len(variations) * BULK_CREDITS_PER_VIDEO
         
         # Check if user has enough credits
         if user.credits_remaining < total_credits:
@@ -244,35 +529,58 @@ def bulk_generate_videos():
                 }
             }), 400
         
-        # Create video generation records for each variation
-        generation_ids = []
-        for variation in variations:
-            video = GeneratedVideo(
-                project_id=data['project_id'],
-                user_id=user.id,
-                actor_id=variation.get('actor_id'),
-                voice_id=variation.get('voice_id'),
-                model_used=variation.get('model', 'kling-1.6'),
-                generation_status='queued',
-                generation_started_at=datetime.utcnow(),
-                credits_used=10
-            )
-            db.session.add(video)
-            generation_ids.append(video.id)
+        # Build every variation up front and write them in a single bulk insert
+        bulk_job_id = str(uuid.uuid4())
+        started_at = datetime.utcnow()
+        rows = []
+        for variation, duration in zip(variations, durations):
+            variation_settings = {**settings, **variation.get('settings', {})}
+            rows.append({
+                'id': str(uuid.uuid4()),
+                'project_id': data['project_id'],
+                'user_id': user.id,
+                'actor_id': variation.get('actor_id'),
+                'voice_id': variation.get('voice_id'),
+                'model_used': variation.get('model', 'kling-1.6'),
+                'duration_seconds': duration,
+                'generation_status': 'queued',
+                'generation_started_at': started_at,
+                'credits_used': BULK_CREDITS_PER_VIDEO,
+                'bulk_job_id': bulk_job_id,
+                'generation_params': {
+                    'script': variation.get('script', data['script']),
+                    'aspect_ratio': variation_settings.get('aspect_ratio', '16:9'),
+                    'quality': variation_settings.get('quality', 'high'),
+                    'allow_model_fallback': bool(variation_settings.get('allow_model_fallback', False))
+                }
+            })
+        db.session.execute(insert(GeneratedVideo), rows)
         
         # Deduct credits from user
         user.credits_remaining -= total_credits
         
         db.session.commit()
+
+        # Workers submit the variations concurrently within each model's limits
+        generation_ids = [row['id'] for row in rows]
+        video_job_queue.enqueue_many(
+            [(row['id'], row['model_used']) for row in rows],
+            job_priority(user)
+        )
+
+        # Slowest model in the batch bounds the expected completion time
+        catalog = pollo_client.get_available_models().get('models', [])
+        estimates = {m['id']: parse_estimated_time(m.get('estimated_time'))['max_seconds'] for m in catalog}
+        longest_render = max(estimates.get(row['model_used'], 180) for row in rows)
         
         return jsonify({
             'success': True,
             'data': {
-                'bulk_job_id': f'bulk_{generation_ids[0]}',
+                'bulk_job_id': bulk_job_id,
                 'generation_ids': generation_ids,
                 'total_videos': len(variations),
                 'credits_required': total_credits,
-                'estimated_completion_time': '2025-08-13T10:35:00Z'
+                'estimated_completion_time': (started_at + timedelta(seconds=longest_render)).isoformat() + 'Z'
             }
         }), 202
         
@@ -286,6 +594,224 @@ def bulk_generate_videos():
             }
         }), 500
 
+@videos_bp.route('/bulk/<bulk_job_id>', methods=['GET'])
+def get_bulk_job_status(bulk_job_id):
+    """Get aggregate status for a bulk generation job"""
+    try:
+        user = get_current_user_from_token()
+        if not user:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'UNAUTHORIZED',
+                    'message': 'Invalid or missing authorization token'
+                }
+            }), 401
+
+        videos = GeneratedVideo.query.filter_by(
+            bulk_job_id=bulk_job_id,
+            user_id=user.id
+        ).order_by(GeneratedVideo.created_at.asc()).all()
+
+        if not videos:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'BULK_JOB_NOT_FOUND',
+                    'message': 'Bulk job not found'
+                }
+            }), 404
+
+        status_counts = {}
+        for video in videos:
+            status_counts[video.generation_status] = status_counts.get(video.generation_status, 0) + 1
+
+        finished = status_counts.get('completed', 0) + status_counts.get('failed', 0)
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'bulk_job_id': bulk_job_id,
+                'status': 'completed' if finished == len(videos) else 'processing',
+                'total_videos': len(videos),
+                'status_counts': status_counts,
+                'videos': [video.to_dict() for video in videos]
+            }
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'BULK_STATUS_ERROR',
+                'message': str(e)
+            }
+        }), 500
+
+@videos_bp.route('/bulk/<bulk_job_id>/events', methods=['GET'])
+def stream_bulk_job_status(bulk_job_id):
+    """Stream status and progress changes for every video in a bulk job"""
+    try:
+        user = get_current_user_from_token_or_query()
+        if not user:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'UNAUTHORIZED',
+                    'message': 'Invalid or missing authorization token'
+                }
+            }), 401
+
+        videos = GeneratedVideo.query.filter_by(bulk_job_id=bulk_job_id, user_id=user.id).all()
+        if not videos:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'BULK_JOB_NOT_FOUND',
+                    'message': 'Bulk job not found'
+                }
+            }), 404
+
+        for video in videos:
+            if video.pollo_task_id and video.generation_status not in TERMINAL_STATUSES:
+                status_poller.track(video)
+
+        return stream_video_events(bulk_topic(bulk_job_id), videos)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'BULK_STATUS_ERROR',
+                'message': str(e)
+            }
+        }), 500
+
+def verify_pollo_signature(payload, signature):
+    """Check the HMAC-SHA256 signature Pollo AI sends with each webhook"""
+    if not POLLO_WEBHOOK_SECRET:
+        # Unsigned webhooks are only accepted while running against demo data
+        return pollo_client.demo_mode
+
+    expected = hmac.new(POLLO_WEBHOOK_SECRET.encode(), payload, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(f'sha256={expected}', signature or '')
+
+# Statuses a Pollo AI callback may move a render to; anything else is rejected
+# rather than stored, which would strand the row outside every known state
+WEBHOOK_STATUSES = {'processing'} | TERMINAL_STATUSES
+
+def webhook_number(value):
+    """Whole number from an int, float or numeric string in a webhook payload; None for anything else"""
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(float(value)) if isinstance(value, (int, float, str)) else None
+    except (ValueError, OverflowError):
+        return None
+
+def webhook_text(value):
+    """Non-empty string from a webhook payload, or None"""
+    return value if isinstance(value, str) and value else None
+
+@videos_bp.route('/webhooks/pollo', methods=['POST'])
+def pollo_webhook():
+    """Receive render progress and completion callbacks from Pollo AI"""
+    try:
+        payload = request.get_data()
+        if not verify_pollo_signature(payload, request.headers.get('X-Pollo-Signature')):
+            return jsonify({
+                'success': False,
+                'message': 'Invalid webhook signature'
+            }), 401
+
+        data = request.get_json(silent=True) or {}
+        task_id = webhook_text(data.get('task_id')) or webhook_text(data.get('id'))
+        status = webhook_text(data.get('status'))
+        if not task_id or not status:
+            return jsonify({
+                'success': False,
+                'message': 'task_id and status are required'
+            }), 400
+        if status not in WEBHOOK_STATUSES:
+            return jsonify({
+                'success': False,
+                'message': f'Unsupported status: {status}'
+            }), 400
+
+        # Indexed lookup by pollo_task_id
+        video = GeneratedVideo.query.filter_by(pollo_task_id=task_id).first()
+        if not video:
+            # The callback can beat the worker committing the task ID;
+            # a non-2xx response makes Pollo AI retry it later
+            return jsonify({
+                'success': False,
+                'message': 'Unknown task'
+            }), 404
+
+        # Optional fields that are missing or malformed are skipped rather than
+        # failing the delivery, which Pollo AI would retry forever
+        progress = webhook_number(data.get('progress'))
+        if status == 'completed':
+            progress = 100
+        elif progress is None:
+            progress = video.progress or 0
+        message = webhook_text(data.get('message'))
+        values = {
+            'generation_status': status,
+            'progress': min(max(progress, 0), 100)
+        }
+        if status in TERMINAL_STATUSES:
+            values['generation_completed_at'] = datetime.utcnow()
+            if webhook_text(data.get('video_url')):
+                values['video_url'] = data['video_url']
+            if webhook_text(data.get('thumbnail_url')):
+                values['thumbnail_url'] = data['thumbnail_url']
+            file_size = webhook_number(data.get('file_size_bytes'))
+            if file_size is None:
+                file_size = webhook_number(data.get('file_size'))
+            if file_size is not None and file_size >= 0:
+                values['file_size_bytes'] = file_size
+            if status == 'failed':
+                values['error_message'] = message or webhook_text(data.get('error'))
+
+        # Only rows that have not finished yet are updated, so retried
+        # deliveries of the same callback are harmless no-ops
+        result = db.session.execute(
+            update(GeneratedVideo).where(
+                GeneratedVideo.id == video.id,
+                GeneratedVideo.generation_status.notin_(TERMINAL_STATUSES)
+            ).values(**values)
+        )
+        db.session.commit()
+
+        if result.rowcount == 0:
+            return jsonify({
+                'success': True,
+                'message': 'Already processed'
+            }), 200
+
+        if status in TERMINAL_STATUSES:
+            status_poller.untrack(video.id)
+
+        publish_video_event({
+            'video_id': video.id,
+            'bulk_job_id': video.bulk_job_id,
+            'status': status,
+            'progress': values['progress'],
+            'message': message or '',
+            'video_url': values.get('video_url', video.video_url),
+            'thumbnail_url': values.get('thumbnail_url', video.thumbnail_url)
+        })
+
+        return jsonify({'success': True}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
 @videos_bp.route('/user', methods=['GET'])
 def get_user_videos():
     """Get user's generated videos"""
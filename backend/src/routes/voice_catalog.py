@@ -0,0 +1,320 @@
+"""
+Voice Catalog
+Keeps the provider voice list in VoiceLibrary, refreshed by a background
+thread, and serves it from an in-memory snapshot with server-side
+filtering and pagination, so listing voices never waits on ElevenLabs
+"""
+
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy import or_
+
+from src.models.user import db
+from src.models.voice import VoiceLibrary
+from .http_client import get_session
+
+# Served when no ElevenLabs key is configured
+DEMO_VOICES = [
+    {
+        'id': 'voice_1',
+        'name': 'Emma (Professional)',
+        'language': 'English',
+        'accent': 'American',
+        'gender': 'Female',
+        'age_range': '25-35',
+        'style': 'Professional',
+        'description': 'Clear, professional voice perfect for business presentations',
+        'sample_url': 'https://demo-voices.elevenlabs.io/emma_professional.mp3',
+        'quality_rating': 4.9,
+        'usage_count': 2150
+    },
+    {
+        'id': 'voice_2',
+        'name': 'James (Narrator)',
+        'language': 'English',
+        'accent': 'British',
+        'gender': 'Male',
+        'age_range': '35-45',
+        'style': 'Narrative',
+        'description': 'Rich, authoritative voice ideal for storytelling and documentaries',
+        'sample_url': 'https://demo-voices.elevenlabs.io/james_narrator.mp3',
+        'quality_rating': 4.8,
+        'usage_count': 1890
+    },
+    {
+        'id': 'voice_3',
+        'name': 'Sofia (Warm)',
+        'language': 'English',
+        'accent': 'American',
+        'gender': 'Female',
+        'age_range': '20-30',
+        'style': 'Friendly',
+        'description': 'Warm, approachable voice great for lifestyle and wellness content',
+        'sample_url': 'https://demo-voices.elevenlabs.io/sofia_warm.mp3',
+        'quality_rating': 4.7,
+        'usage_count': 1650
+    },
+    {
+        'id': 'voice_4',
+        'name': 'Alex (Tech)',
+        'language': 'English',
+        'accent': 'American',
+        'gender': 'Male',
+        'age_range': '25-35',
+        'style': 'Technical',
+        'description': 'Clear, precise voice perfect for technical explanations and tutorials',
+        'sample_url': 'https://demo-voices.elevenlabs.io/alex_tech.mp3',
+        'quality_rating': 4.6,
+        'usage_count': 1420
+    },
+    {
+        'id': 'voice_5',
+        'name': 'Isabella (Elegant)',
+        'language': 'English',
+        'accent': 'American',
+        'gender': 'Female',
+        'age_range': '30-40',
+        'style': 'Elegant',
+        'description': 'Sophisticated, refined voice ideal for luxury brands and premium content',
+        'sample_url': 'https://demo-voices.elevenlabs.io/isabella_elegant.mp3',
+        'quality_rating': 4.8,
+        'usage_count': 980
+    },
+    {
+        'id': 'voice_6',
+        'name': 'Marcus (Casual)',
+        'language': 'English',
+        'accent': 'American',
+        'gender': 'Male',
+        'age_range': '20-30',
+        'style': 'Casual',
+        'description': 'Relaxed, conversational voice perfect for informal content and social media',
+        'sample_url': 'https://demo-voices.elevenlabs.io/marcus_casual.mp3',
+        'quality_rating': 4.5,
+        'usage_count': 1200
+    }
+]
+
+FILTER_FIELDS = ('gender', 'accent', 'style', 'language')
+
+def voice_from_elevenlabs(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Map an ElevenLabs /v1/voices entry onto VoiceLibrary columns"""
+    labels = item.get('labels') or {}
+    return {
+        'id': item.get('voice_id') or item.get('id'),
+        'name': item.get('name'),
+        'description': item.get('description') or labels.get('description') or '',
+        'language': labels.get('language') or 'English',
+        'accent': (labels.get('accent') or '').title(),
+        'gender': (labels.get('gender') or '').title(),
+        'style': (labels.get('use_case') or labels.get('descriptive') or '').replace('_', ' ').title(),
+        'age_range': (labels.get('age') or '').replace('_', ' ').title(),
+        'preview_audio_url': item.get('preview_url') or '',
+        'ai_service': 'elevenlabs'
+    }
+
+def voice_from_demo(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'id': item['id'],
+        'name': item['name'],
+        'description': item['description'],
+        'language': item['language'],
+        'accent': item['accent'],
+        'gender': item['gender'],
+        'style': item['style'],
+        'age_range': item['age_range'],
+        'preview_audio_url': item['sample_url'],
+        'quality_score': item['quality_rating'],
+        'usage_count': item['usage_count'],
+        'ai_service': 'demo'
+    }
+
+def voice_summary(voice: VoiceLibrary) -> Dict[str, Any]:
+    """Shape of a voice in the /api/voices listing"""
+    return {
+        'id': voice.id,
+        'name': voice.name,
+        'language': voice.language or '',
+        'accent': voice.accent or '',
+        'gender': voice.gender or '',
+        'age_range': voice.age_range or '',
+        'style': voice.style or '',
+        'description': voice.description or '',
+        'sample_url': voice.preview_audio_url or '',
+        'quality_rating': float(voice.quality_score) if voice.quality_score is not None else None,
+        'usage_count': voice.usage_count
+    }
+
+@dataclass
+class CatalogSnapshot:
+    voices: List[Dict[str, Any]]
+    filters: Dict[str, List[str]]
+    loaded_at: float
+
+class VoiceCatalog:
+    """
+    Provider voice catalog backed by VoiceLibrary.
+
+    A background thread re-syncs from ElevenLabs every ``refresh_interval``
+    seconds (retrying sooner after a failure). Requests read an immutable
+    in-memory snapshot that is swapped after each sync; only a process
+    that starts with an empty table syncs inline, once.
+    """
+
+    def __init__(self, api_base: str, api_key: Optional[str], refresh_interval: float = None,
+                 retry_interval: float = 60):
+        self.api_base = api_base.rstrip('/')
+        self.api_key = api_key
+        self.refresh_interval = refresh_interval or float(os.environ.get('VOICE_CATALOG_REFRESH_SECONDS', 3600))
+        self.retry_interval = retry_interval
+        self.app = None
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._sync_lock = threading.RLock()  # Re-entered when _current_snapshot syncs inline
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['voice_catalog'] = self
+        app.before_request(self.start)
+
+    def start(self):
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, name='voice-catalog-sync', daemon=True)
+        self._thread.start()
+
+    def query(self, gender: str = None, accent: str = None, style: str = None, language: str = None,
+              search: str = None, page: int = 1, limit: int = 50) -> Dict[str, Any]:
+        """Filter and paginate the active catalog"""
+        snapshot = self._current_snapshot()
+        voices = snapshot.voices
+
+        if gender:
+            voices = [v for v in voices if v['gender'].lower() == gender.lower()]
+        if accent:
+            voices = [v for v in voices if v['accent'].lower() == accent.lower()]
+        if style:
+            voices = [v for v in voices if style.lower() in v['style'].lower()]
+        if language:
+            voices = [v for v in voices if v['language'].lower() == language.lower()]
+        if search:
+            term = search.lower()
+            voices = [v for v in voices if term in v['name'].lower() or term in v['description'].lower()]
+
+        limit = min(max(limit, 1), 100)
+        total = len(voices)
+        total_pages = max(math.ceil(total / limit), 1)
+        page = min(max(page, 1), total_pages)
+        start = (page - 1) * limit
+
+        return {
+            'voices': voices[start:start + limit],
+            'total_count': total,
+            'filters': snapshot.filters,
+            'pagination': {
+                'page': page,
+                'limit': limit,
+                'total': total,
+                'total_pages': total_pages
+            }
+        }
+
+    def get(self, voice_id: str) -> Optional[Dict[str, Any]]:
+        return next((v for v in self._current_snapshot().voices if v['id'] == voice_id), None)
+
+    def sync(self) -> int:
+        """Pull the provider catalog into VoiceLibrary and swap in a new snapshot; returns the voice count"""
+        with self._sync_lock:
+            if self.api_key:
+                response = get_session(self.api_base).get(
+                    f"{self.api_base}/voices",
+                    headers={'xi-api-key': self.api_key},
+                    timeout=(5, 15)
+                )
+                response.raise_for_status()
+                voices = [voice_from_elevenlabs(v) for v in response.json().get('voices') or []]
+            else:
+                voices = [voice_from_demo(v) for v in DEMO_VOICES]
+
+            now = datetime.utcnow()
+            existing = {v.id: v for v in VoiceLibrary.query.all()}
+            for fields in voices:
+                if not fields['id']:
+                    continue
+                voice = existing.get(fields['id'])
+                if voice is None:
+                    voice = VoiceLibrary(id=fields['id'])
+                    db.session.add(voice)
+                for column, value in fields.items():
+                    setattr(voice, column, value)
+                voice.is_active = True
+                voice.synced_at = now
+
+            db.session.flush()
+
+            # Voices the provider no longer lists stay in the table but are hidden
+            VoiceLibrary.query.filter(
+                VoiceLibrary.is_active.is_(True),
+                or_(VoiceLibrary.synced_at.is_(None), VoiceLibrary.synced_at < now)
+            ).update({'is_active': False}, synchronize_session=False)
+            db.session.commit()
+
+            self._snapshot = self._load_snapshot()
+            return len(voices)
+
+    def _current_snapshot(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._load_snapshot()
+            if not snapshot.voices:
+                # Fresh database: fill it once rather than serve an empty list
+                with self._sync_lock:
+                    if self._snapshot is None:
+                        self._sync_or_log()
+                snapshot = self._snapshot or snapshot
+            self._snapshot = snapshot
+        return snapshot
+
+    def _load_snapshot(self) -> CatalogSnapshot:
+        rows = VoiceLibrary.query.filter_by(is_active=True).order_by(VoiceLibrary.name).all()
+        voices = [voice_summary(v) for v in rows]
+        return CatalogSnapshot(
+            voices=voices,
+            filters={
+                f"{field}s": sorted({v[field] for v in voices if v[field]})
+                for field in FILTER_FIELDS
+            },
+            loaded_at=time.time()
+        )
+
+    def _sync_or_log(self) -> bool:
+        try:
+            count = self.sync()
+            current_app.logger.info(f"Voice catalog synced: {count} voices")
+            return True
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Voice catalog sync failed: {str(e)}")
+            return False
+
+    def _run(self):
+        with self.app.app_context():
+            newest = db.session.query(db.func.max(VoiceLibrary.synced_at)).scalar()
+        wait = 0
+        if newest:
+            wait = max((newest + timedelta(seconds=self.refresh_interval) - datetime.utcnow()).total_seconds(), 0)
+
+        while True:
+            time.sleep(wait)
+            with self.app.app_context():
+                ok = self._sync_or_log()
+            wait = self.refresh_interval if ok else self.retry_interval
@@ -0,0 +1,234 @@
+"""
+Voice Clone Queue
+Uploads voice samples to ElevenLabs on a background worker so a clone
+request returns as soon as its samples are stored, then renders a preview
+of the new voice
+"""
+
+import os
+import queue
+import shutil
+import threading
+import time
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+import requests
+from sqlalchemy import or_, update
+
+from src.models.user import db
+from src.models.voice import VoiceClone
+from .tts_jobs import Producer
+from .voice_catalog import VoiceCatalog
+from .voice_uploads import MultipartStream
+
+CLONE_PREVIEW_TEXT = os.environ.get(
+    'VOICE_CLONE_PREVIEW_TEXT',
+    "Hi there! This is a preview of my cloned voice. How does it sound?"
+)
+
+class VoiceCloneQueue:
+    """
+    Durable queue of VoiceClone rows being created.
+
+    A clone starts 'pending' with its samples saved under ``sample_dir``;
+    a worker claims it ('uploading'), streams the samples to ElevenLabs
+    /voices/add and marks it 'ready' with the external voice ID, then
+    renders ``preview_audio_url`` with ``producer`` (voices.produce_audio)
+    and re-syncs ``catalog`` so the new voice is listed right away.
+    Samples are deleted once the clone is ready or has failed. Pending
+    clones are picked up again on startup.
+
+    The claim carries a lease timestamp, and an 'uploading' row is only
+    retried once its lease has expired, so a restart or a second process
+    never re-uploads (and duplicates upstream) a clone another worker is
+    still sending. ``upload_lease`` must outlast the longest upload.
+    """
+
+    def __init__(self, api_base: str, api_key: str, sample_dir: Path, producer: Producer,
+                 catalog: VoiceCatalog, num_workers: int = None, upload_lease_seconds: int = None):
+        self.api_base = api_base
+        self.api_key = api_key
+        self.sample_dir = Path(sample_dir)
+        self.producer = producer
+        self.catalog = catalog
+        self.num_workers = num_workers or int(os.environ.get('VOICE_CLONE_WORKERS', 2))
+        self.upload_lease = timedelta(
+            seconds=upload_lease_seconds or int(os.environ.get('VOICE_CLONE_UPLOAD_LEASE_SECONDS', 600))
+        )
+        self.app = None
+        self._queue = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._started = False
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Bind the queue to the Flask app; workers start with the first request"""
+        self.app = app
+        app.extensions['voice_clone_queue'] = self
+        app.before_request(self.start)
+
+    def start(self):
+        """Start the worker pool and recover clones left over from the last run"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        self._requeue_pending()
+
+        for index in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f'voice-clone-worker-{index}',
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+        threading.Thread(target=self._lease_loop, name='voice-clone-lease-reaper', daemon=True).start()
+
+    def samples_dir_for(self, clone_id: str) -> Path:
+        return self.sample_dir / clone_id
+
+    def enqueue(self, clone_id: str):
+        """Schedule a committed 'pending' VoiceClone"""
+        self.start()
+        self._queue.put(clone_id)
+
+    def _requeue_pending(self):
+        with self.app.app_context():
+            self._reclaim_expired_uploads()
+            pending = db.session.query(VoiceClone.id).filter(
+                VoiceClone.status == 'pending'
+            ).order_by(VoiceClone.created_at.asc()).all()
+            for (clone_id,) in pending:
+                self._queue.put(clone_id)
+
+    def _lease_loop(self):
+        # A process that died mid-upload leaves its claim behind; retry it once the lease runs out
+        while True:
+            time.sleep(self.upload_lease.total_seconds() / 2)
+            try:
+                with self.app.app_context():
+                    for clone_id in self._reclaim_expired_uploads():
+                        self._queue.put(clone_id)
+            except Exception as e:
+                self.app.logger.error(f"Reclaiming expired voice clone uploads failed: {str(e)}")
+
+    def _reclaim_expired_uploads(self) -> List[str]:
+        """Return 'uploading' rows whose lease has expired to 'pending'"""
+        # An interrupted upload may or may not have created the voice upstream; retrying
+        # risks a duplicate there, but leaving it stuck would lose the user's samples
+        expired = or_(
+            VoiceClone.upload_claimed_at.is_(None),
+            VoiceClone.upload_claimed_at < datetime.utcnow() - self.upload_lease
+        )
+        clone_ids = [
+            clone_id for (clone_id,) in db.session.query(VoiceClone.id).filter(
+                VoiceClone.status == 'uploading', expired
+            )
+        ]
+        if clone_ids:
+            db.session.execute(
+                update(VoiceClone).where(
+                    VoiceClone.id.in_(clone_ids),
+                    VoiceClone.status == 'uploading',
+                    expired
+                ).values(status='pending', upload_claimed_at=None)
+            )
+        db.session.commit()
+        return clone_ids
+
+    def _worker_loop(self):
+        while True:
+            clone_id = self._queue.get()
+            try:
+                with self.app.app_context():
+                    self._process(clone_id)
+            except Exception as e:
+                self.app.logger.error(f"Voice clone {clone_id} crashed: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _process(self, clone_id: str):
+        # Claim the row atomically so a clone enqueued twice is uploaded once
+        claimed = db.session.execute(
+            update(VoiceClone).where(
+                VoiceClone.id == clone_id,
+                VoiceClone.status == 'pending'
+            ).values(status='uploading', upload_claimed_at=datetime.utcnow())
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return
+
+        clone = VoiceClone.query.get(clone_id)
+        try:
+            clone.voice_id_external = self._upload(clone)
+            clone.ai_service = 'elevenlabs'
+            clone.status = 'ready'
+        except Exception as e:
+            db.session.rollback()
+            clone.status = 'failed'
+            clone.error_message = str(e)
+        clone.completed_at = datetime.utcnow()
+        clone.sample_files = None
+        db.session.commit()
+        shutil.rmtree(self.samples_dir_for(clone_id), ignore_errors=True)
+
+        if clone.status == 'ready':
+            self._render_preview(clone)
+            self._sync_catalog(clone)
+
+    def _upload(self, clone: VoiceClone) -> str:
+        if not self.api_key:
+            raise RuntimeError('ELEVENLABS_API_KEY not set on server')
+
+        fields = [('name', clone.name)]
+        if clone.description:
+            fields.append(('description', clone.description))
+
+        with ExitStack() as stack:
+            files = [
+                ('files', sample['filename'], stack.enter_context(open(sample['path'], 'rb')), sample['mimetype'])
+                for sample in clone.sample_files or []
+            ]
+            body = MultipartStream(fields, files)
+            response = requests.post(
+                f"{self.api_base}/voices/add",
+                headers={'xi-api-key': self.api_key, 'Content-Type': body.content_type},
+                data=body,
+                timeout=60,
+            )
+        if not response.ok:
+            raise RuntimeError(response.text or f"ElevenLabs returned {response.status_code}")
+
+        payload = response.json()
+        voice_id = payload.get('voice_id') or payload.get('id')
+        if not voice_id:
+            raise RuntimeError('ElevenLabs did not return a voice ID')
+        return voice_id
+
+    def _render_preview(self, clone: VoiceClone):
+        """Synthesize a short sample in the new voice; the clone stays usable if this fails"""
+        try:
+            audio_path, _, _ = self.producer({'text': CLONE_PREVIEW_TEXT, 'voice_id': clone.voice_id_external}, None)
+        except Exception as e:
+            self.app.logger.warning(f"Preview for voice clone {clone.id} failed: {str(e)}")
+            return
+        # Copied out of the TTS cache so LRU eviction cannot break the link
+        preview_path = audio_path.with_name(f"clone_{clone.id}.mp3")
+        shutil.copyfile(audio_path, preview_path)
+        clone.preview_audio_url = f"/audio/{preview_path.name}"
+        db.session.commit()
+
+    def _sync_catalog(self, clone: VoiceClone):
+        """List the new voice now instead of at the next scheduled sync"""
+        try:
+            self.catalog.sync()
+        except Exception as e:
+            db.session.rollback()
+            self.app.logger.warning(f"Catalog sync after voice clone {clone.id} failed: {str(e)}")
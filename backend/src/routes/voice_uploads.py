@@ -0,0 +1,148 @@
+"""
+Voice Sample Uploads
+Parses voice-cloning uploads with size limits enforced while the request
+is read, spooling samples to disk, and streams them on to ElevenLabs as a
+multipart body read from those files in chunks
+"""
+
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from werkzeug.datastructures import FileStorage, MultiDict
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.formparser import parse_form_data
+from werkzeug.utils import secure_filename
+
+# ElevenLabs instant cloning accepts up to 25 samples of about 10 MB each
+CLONE_MAX_FILES = int(os.environ.get('VOICE_CLONE_MAX_FILES', 25))
+CLONE_MAX_FILE_BYTES = int(os.environ.get('VOICE_CLONE_MAX_FILE_BYTES', 10 * 1024 * 1024))
+CLONE_MAX_TOTAL_BYTES = int(os.environ.get('VOICE_CLONE_MAX_TOTAL_BYTES', 50 * 1024 * 1024))
+# Samples below this stay in memory; larger ones roll over to a temporary file
+SPOOL_MEMORY_BYTES = 1024 * 1024
+
+class UploadTooLarge(RequestEntityTooLarge):
+    def __init__(self, message: str):
+        super().__init__(description=message)
+
+class LimitedSpool(tempfile.SpooledTemporaryFile):
+    """Spooled temporary file that refuses writes past ``limit`` bytes"""
+
+    def __init__(self, limit: int, filename: Optional[str] = None):
+        super().__init__(max_size=SPOOL_MEMORY_BYTES)
+        self.limit = limit
+        self.filename = filename
+        self.written = 0
+
+    def write(self, data) -> int:
+        self.written += len(data)
+        if self.written > self.limit:
+            raise UploadTooLarge(
+                f"{self.filename or 'Upload'} exceeds the {self.limit // (1024 * 1024)} MB per-file limit"
+            )
+        return super().write(data)
+
+def _sample_stream_factory(total_content_length, content_type, filename, content_length=None):
+    return LimitedSpool(CLONE_MAX_FILE_BYTES, filename)
+
+def parse_sample_upload(environ) -> Tuple[MultiDict, List[FileStorage]]:
+    """
+    Parse a multipart clone request into (form, sample files).
+
+    The body is read incrementally: the total size is capped by
+    CLONE_MAX_TOTAL_BYTES and each file by CLONE_MAX_FILE_BYTES as the
+    bytes arrive, so an oversized upload is refused (413) without first
+    being buffered. Must run before anything touches ``request.form``.
+    """
+    _, form, files = parse_form_data(
+        environ,
+        stream_factory=_sample_stream_factory,
+        max_content_length=CLONE_MAX_TOTAL_BYTES,
+        max_form_memory_size=64 * 1024,
+        silent=False
+    )
+    samples = [f for f in files.getlist('files') if f.filename]
+    if len(samples) > CLONE_MAX_FILES:
+        raise UploadTooLarge(f"At most {CLONE_MAX_FILES} audio files can be uploaded")
+    return form, samples
+
+def save_samples(files: List[FileStorage], directory: Path) -> List[Dict[str, Any]]:
+    """Copy spooled samples into ``directory`` in chunks; returns their descriptors for the clone job"""
+    directory.mkdir(parents=True, exist_ok=True)
+    samples = []
+    for index, f in enumerate(files):
+        path = directory / f"{index:02d}_{secure_filename(f.filename) or 'sample'}"
+        f.stream.seek(0)
+        with open(path, 'wb') as out:
+            shutil.copyfileobj(f.stream, out, 64 * 1024)
+        samples.append({
+            'filename': f.filename,
+            'path': str(path),
+            'mimetype': f.mimetype or 'audio/mpeg'
+        })
+    return samples
+
+def _stream_size(stream: BinaryIO) -> int:
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+def _quote(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\r', ' ').replace('\n', ' ')
+
+class MultipartStream:
+    """
+    multipart/form-data body that requests sends without buffering it.
+
+    File parts are read from their (spooled) streams in ``chunk_size``
+    pieces as the upload goes out. The length is known up front, so the
+    request carries a Content-Length instead of chunked encoding.
+    """
+
+    def __init__(self, fields: List[Tuple[str, str]], files: List[Tuple[str, str, BinaryIO, str]],
+                 chunk_size: int = 64 * 1024):
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self._parts: List[Tuple[bytes, Optional[BinaryIO], int]] = []
+        for name, value in fields:
+            header = (
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'
+                f'{value}\r\n'
+            ).encode()
+            self._parts.append((header, None, 0))
+        for name, filename, stream, mimetype in files:
+            header = (
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{_quote(name)}"; filename="{_quote(filename)}"\r\n'
+                f'Content-Type: {mimetype}\r\n\r\n'
+            ).encode()
+            self._parts.append((header, stream, _stream_size(stream)))
+        self._closing = f'--{self.boundary}--\r\n'.encode()
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self) -> int:
+        # Each file part is followed by a CRLF before the next boundary
+        return sum(len(header) + (size + 2 if stream else 0) for header, stream, size in self._parts) \
+            + len(self._closing)
+
+    def __iter__(self) -> Iterator[bytes]:
+        for header, stream, _ in self._parts:
+            yield header
+            if stream is None:
+                continue
+            stream.seek(0)
+            while True:
+                chunk = stream.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+            yield b'\r\n'
+        yield self._closing
@@ -1,177 +1,66 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask import Response
+from flask import Response, send_file
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
+import queue
+import re
+import tempfile
+import threading
+import uuid
 from urllib.parse import urlparse
 import requests
-from datetime import datetime
 from pathlib import Path
 
+from .tts_cache import TTSCache, tts_cache_key, DEFAULT_TTS_MODEL
+from .preview_cache import PreviewCache, UpstreamError
+from .voice_catalog import VoiceCatalog
+from .audio_analysis import Mp3Analyzer, analyze_mp3
+from .tts_synthesis import SynthesisError, key_slots, split_script, synthesize_segments
+from .voice_uploads import UploadTooLarge, parse_sample_upload, save_samples, CLONE_MAX_TOTAL_BYTES
+from .voice_clones import VoiceCloneQueue
+from .tts_jobs import TTSJobQueue, tts_job_events, tts_job_topic, TERMINAL_JOB_STATUSES
+from .video_events import format_sse
+from src.models.user import User, db
+from src.models.voice import VoiceClone, VoiceGenerationJob
+from src.routes.auth import verify_token
+
 ELEVEN_API_BASE = 'https://api.elevenlabs.io/v1'
 ELEVENLABS_API_KEY = os.environ.get('ELEVENLABS_API_KEY')
 
+# Proxied preview samples rarely change: keep them on disk and let browsers cache them too
+PREVIEW_MAX_AGE = int(os.environ.get('VOICE_PREVIEW_MAX_AGE', 86400))
+preview_cache = PreviewCache(
+    Path(os.environ.get('VOICE_PREVIEW_CACHE_DIR') or Path(tempfile.gettempdir()) / 'voice_previews'),
+    ttl=PREVIEW_MAX_AGE,
+    max_bytes=int(os.environ.get('VOICE_PREVIEW_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+)
+
+# Listing voices reads this; a background thread keeps it in sync with ElevenLabs
+voice_catalog = VoiceCatalog(ELEVEN_API_BASE, ELEVENLABS_API_KEY)
+
 voices_bp = Blueprint('voices', __name__)
 
 @voices_bp.route('/', methods=['GET'])
 def get_voices():
-    """Get available voices"""
+    """
+    Get available voices from the synced catalog.
+
+    Query params: gender, accent, language (exact), style, search
+    (substring), page, limit (max 100).
+    """
     try:
-        if ELEVENLABS_API_KEY:
-            try:
-                r = requests.get(f"{ELEVEN_API_BASE}/voices", headers={'xi-api-key': ELEVENLABS_API_KEY})
-                if r.ok:
-                    payload = r.json()
-                    items = payload.get('voices') or []
-                    mapped = []
-                    for v in items:
-                        mapped.append({
-                            'id': v.get('voice_id') or v.get('id'),
-                            'name': v.get('name'),
-                            'language': 'English',
-                            'accent': '',
-                            'gender': '',
-                            'age_range': '',
-                            'style': '',
-                            'description': v.get('description') or '',
-                            'sample_url': v.get('preview_url') or '',
-                            'quality_rating': None,
-                            'usage_count': None
-                        })
-                    return jsonify({
-                        'success': True,
-                        'data': {
-                            'voices': mapped,
-                            'total_count': len(mapped),
-                            'filters': {'genders': [], 'accents': [], 'styles': [], 'languages': []},
-                            'pagination': {'page': 1, 'limit': 50, 'total': len(mapped), 'total_pages': 1},
-                        }
-                    })
-            except Exception as ex:
-                if current_app:
-                    current_app.logger.error(f"ElevenLabs voices fetch failed: {ex}")
-
-        # Mock voices data for demo
-        mock_voices = [
-            {
-                'id': 'voice_1',
-                'name': 'Emma (Professional)',
-                'language': 'English',
-                'accent': 'American',
-                'gender': 'Female',
-                'age_range': '25-35',
-                'style': 'Professional',
-                'description': 'Clear, professional voice perfect for business presentations',
-                'sample_url': 'https://demo-voices.elevenlabs.io/emma_professional.mp3',
-                'quality_rating': 4.9,
-                'usage_count': 2150
-            },
-            {
-                'id': 'voice_2',
-                'name': 'James (Narrator)',
-                'language': 'English',
-                'accent': 'British',
-                'gender': 'Male',
-                'age_range': '35-45',
-                'style': 'Narrative',
-                'description': 'Rich, authoritative voice ideal for storytelling and documentaries',
-                'sample_url': 'https://demo-voices.elevenlabs.io/james_narrator.mp3',
-                'quality_rating': 4.8,
-                'usage_count': 1890
-            },
-            {
-                'id': 'voice_3',
-                'name': 'Sofia (Warm)',
-                'language': 'English',
-                'accent': 'American',
-                'gender': 'Female',
-                'age_range': '20-30',
-                'style': 'Friendly',
-                'description': 'Warm, approachable voice great for lifestyle and wellness content',
-                'sample_url': 'https://demo-voices.elevenlabs.io/sofia_warm.mp3',
-                'quality_rating': 4.7,
-                'usage_count': 1650
-            },
-            {
-                'id': 'voice_4',
-                'name': 'Alex (Tech)',
-                'language': 'English',
-                'accent': 'American',
-                'gender': 'Male',
-                'age_range': '25-35',
-                'style': 'Technical',
-                'description': 'Clear, precise voice perfect for technical explanations and tutorials',
-                'sample_url': 'https://demo-voices.elevenlabs.io/alex_tech.mp3',
-                'quality_rating': 4.6,
-                'usage_count': 1420
-            },
-            {
-                'id': 'voice_5',
-                'name': 'Isabella (Elegant)',
-                'language': 'English',
-                'accent': 'American',
-                'gender': 'Female',
-                'age_range': '30-40',
-                'style': 'Elegant',
-                'description': 'Sophisticated, refined voice ideal for luxury brands and premium content',
-                'sample_url': 'https://demo-voices.elevenlabs.io/isabella_elegant.mp3',
-                'quality_rating': 4.8,
-                'usage_count': 980
-            },
-            {
-                'id': 'voice_6',
-                'name': 'Marcus (Casual)',
-                'language': 'English',
-                'accent': 'American',
-                'gender': 'Male',
-                'age_range': '20-30',
-                'style': 'Casual',
-                'description': 'Relaxed, conversational voice perfect for informal content and social media',
-                'sample_url': 'https://demo-voices.elevenlabs.io/marcus_casual.mp3',
-                'quality_rating': 4.5,
-                'usage_count': 1200
-            }
-        ]
-        
-        # Apply filters if provided
-        gender_filter = request.args.get('gender')
-        accent_filter = request.args.get('accent')
-        style_filter = request.args.get('style')
-        language_filter = request.args.get('language')
-        
-        filtered_voices = mock_voices
-        
-        if gender_filter:
-            filtered_voices = [v for v in filtered_voices if v['gender'].lower() == gender_filter.lower()]
-        
-        if accent_filter:
-            filtered_voices = [v for v in filtered_voices if v['accent'].lower() == accent_filter.lower()]
-        
-        if style_filter:
-            filtered_voices = [v for v in filtered_voices if style_filter.lower() in v['style'].lower()]
-        
-        if language_filter:
-            filtered_voices = [v for v in filtered_voices if v['language'].lower() == language_filter.lower()]
-        
-        # Get filter options
-        filters = {
-            'genders': list(set([v['gender'] for v in mock_voices])),
-            'accents': list(set([v['accent'] for v in mock_voices])),
-            'styles': list(set([v['style'] for v in mock_voices])),
-            'languages': list(set([v['language'] for v in mock_voices]))
-        }
-        
+        data = voice_catalog.query(
+            gender=request.args.get('gender'),
+            accent=request.args.get('accent'),
+            style=request.args.get('style'),
+            language=request.args.get('language'),
+            search=request.args.get('search'),
+            page=request.args.get('page', 1, type=int),
+            limit=request.args.get('limit', 50, type=int)
+        )
         return jsonify({
             'success': True,
-            'data': {
-                'voices': filtered_voices,
-                'total_count': len(filtered_voices),
-                'filters': filters,
-                'pagination': {
-                    'page': 1,
-                    'limit': 50,
-                    'total': len(filtered_voices),
-                    'total_pages': 1
-                }
-            }
+            'data': data
         })
         
     except Exception as e:
@@ -208,21 +97,25 @@ def preview_proxy():
             'api.elevenlabs.io',
             'elevenlabs.io',
         }
-        if parsed.hostname not in allowed_hosts and not parsed.hostname.endswith('googleapis.com'):
+        if parsed.hostname not in allowed_hosts and not (parsed.hostname or '').endswith('googleapis.com'):
             return jsonify({'success': False, 'message': 'Host not allowed'}), 400
 
-        r = requests.get(url, stream=True, timeout=30)
-        if not r.ok:
-            return jsonify({'success': False, 'message': f'Upstream error: {r.status_code}'}), r.status_code
-
-        def generate():
-            for chunk in r.iter_content(chunk_size=8192):
-                if chunk:
-                    yield chunk
+        entry, body_path = preview_cache.fetch(url)
 
-        content_type = r.headers.get('Content-Type', 'audio/mpeg')
-        return Response(generate(), content_type=content_type)
+        # send_file answers Range requests with 206 and If-None-Match with 304
+        response = send_file(
+            body_path,
+            mimetype=entry.content_type,
+            conditional=True,
+            etag=entry.etag,
+            max_age=PREVIEW_MAX_AGE
+        )
+        response.cache_control.public = True
+        response.headers['Accept-Ranges'] = 'bytes'
+        return response
 
+    except UpstreamError as e:
+        return jsonify({'success': False, 'message': str(e)}), e.status_code
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -250,7 +143,7 @@ def get_voice(voice_id):
             }
         }
         
-        voice = voices.get(voice_id)
+        voice = voices.get(voice_id) or voice_catalog.get(voice_id)
         if not voice:
             return jsonify({
                 'success': False,
@@ -270,9 +163,168 @@ def get_voice(voice_id):
             'message': str(e)
         }), 500
 
+def get_audio_dir() -> Path:
+    """Directory under static/ where synthesized audio is stored and served from /audio"""
+    static_dir = (Path(__file__).resolve().parent.parent / 'static').resolve()
+    audio_dir = static_dir / 'audio'
+    audio_dir.mkdir(parents=True, exist_ok=True)
+    return audio_dir
+
+# Identical synthesis requests share one file; least recently used files go first
+tts_cache = TTSCache(get_audio_dir(), max_bytes=int(os.environ.get('TTS_CACHE_MAX_BYTES', 500 * 1024 * 1024)))
+
+def synthesis_key(data):
+    return tts_cache_key(data['voice_id'], data['text'], data.get('model_id'), data.get('voice_settings'),
+                         data.get('previous_text'), data.get('next_text'))
+
+def partial_audio_path(key):
+    """Unique scratch file for an in-progress synthesis; renamed into the cache when complete"""
+    return tts_cache.directory / f".{tts_cache.filename(key)}.{uuid.uuid4().hex}.part"
+
+def open_tts_stream(data):
+    """Start a streaming ElevenLabs text-to-speech request for ``data`` (text, voice_id, ...)"""
+    endpoint = f"{ELEVEN_API_BASE}/text-to-speech/{data['voice_id']}/stream"
+    headers = {'xi-api-key': ELEVENLABS_API_KEY, 'Content-Type': 'application/json'}
+    payload = {'text': data['text'], 'model_id': data.get('model_id', DEFAULT_TTS_MODEL)}
+    if data.get('voice_settings'):
+        payload['voice_settings'] = data['voice_settings']
+    # Context for script segments so intonation carries across the joins
+    for field in ('previous_text', 'next_text'):
+        if data.get(field):
+            payload[field] = data[field]
+    return requests.post(endpoint, headers=headers, json=payload, stream=True, timeout=(5, 60))
+
+def store_audio(key, audio, analysis=None):
+    """Write complete audio into the TTS cache under ``key``, with its duration and waveform"""
+    partial_path = partial_audio_path(key)
+    try:
+        partial_path.write_bytes(audio)
+        return tts_cache.put(key, partial_path, analysis or analyze_mp3(audio))
+    finally:
+        partial_path.unlink(missing_ok=True)
+
+def audio_analysis(audio_path):
+    """Duration and waveform stored with a cached file, computed now for files cached before analysis existed"""
+    key = audio_path.stem[len('tts_'):]
+    analysis = tts_cache.metadata(key)
+    if analysis is None:
+        analyzer = Mp3Analyzer()
+        with open(audio_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                analyzer.feed(chunk)
+        analysis = analyzer.result()
+        tts_cache.set_metadata(key, analysis)
+    return analysis
+
+def synthesize_audio(data):
+    """Synthesize ``data`` in one upstream call and cache it; returns the audio bytes"""
+    if not ELEVENLABS_API_KEY:
+        raise SynthesisError(400, 'ELEVENLABS_API_KEY not set on server')
+    with key_slots(ELEVENLABS_API_KEY):
+        resp = open_tts_stream(data)
+        try:
+            if not resp.ok:
+                raise SynthesisError(resp.status_code, resp.text)
+            analyzer = Mp3Analyzer()
+            chunks = []
+            for chunk in resp.iter_content(chunk_size=8192):
+                if chunk:
+                    analyzer.feed(chunk)
+                    chunks.append(chunk)
+        finally:
+            resp.close()
+    audio = b''.join(chunks)
+    store_audio(synthesis_key(data), audio, analyzer.result())
+    return audio
+
+def synthesize_segment(data):
+    """Audio for one script segment, reusing a cached copy when the segment and its context are unchanged"""
+    audio_path = tts_cache.get(synthesis_key(data))
+    if audio_path:
+        try:
+            return audio_path.read_bytes(), True
+        except FileNotFoundError:
+            pass  # Evicted in between
+    return synthesize_audio(data), False
+
+def produce_audio(data, on_progress=None):
+    """
+    Return (cached file, cache hit, segment count) for a synthesis request.
+
+    Scripts longer than one segment are split at sentence boundaries and
+    the segments synthesized in parallel (see tts_synthesis); ``on_progress``
+    receives an event per finished segment.
+    """
+    key = synthesis_key(data)
+    segments = split_script(data['text'])
+    # Concurrent identical requests wait for one synthesis instead of each paying for it
+    with tts_cache.lock_for(key):
+        audio_path = tts_cache.get(key)
+        if audio_path:
+            return audio_path, True, len(segments)
+
+        if len(segments) <= 1:
+            synthesize_audio(data)
+            return tts_cache.path(key), False, len(segments)
+
+        audio = synthesize_segments(data, segments, synthesize_segment, on_progress)
+        return store_audio(key, audio), False, len(segments)
+
+# Background synthesis for requests made with "async": true
+tts_job_queue = TTSJobQueue(produce_audio)
+
+# Uploads clone samples to ElevenLabs and renders their previews in the background
+voice_clone_queue = VoiceCloneQueue(
+    ELEVEN_API_BASE, ELEVENLABS_API_KEY,
+    Path(os.environ.get('VOICE_CLONE_SAMPLE_DIR') or Path(tempfile.gettempdir()) / 'voice_clone_samples'),
+    produce_audio,
+    voice_catalog
+)
+
+def audio_payload(data, audio_path, cached, segments, base):
+    filename = audio_path.name
+    analysis = audio_analysis(audio_path)
+    return {
+        'audio_id': filename[:-4],
+        'audio_url': f"/audio/{filename}",
+        'audio_url_absolute': f"{base}/audio/{filename}",
+        'duration': analysis['duration'],
+        'waveform': analysis['waveform'],
+        'waveform_resolution': analysis['waveform_resolution'],
+        'voice_id': data['voice_id'],
+        'text': data['text'],
+        'cached': cached,
+        'segments': segments
+    }
+
+@voices_bp.route('/audio/<audio_id>/analysis', methods=['GET'])
+def get_audio_analysis(audio_id):
+    """Duration and peak waveform of generated audio, for laying out timeline tracks"""
+    if not re.fullmatch(r'tts_[0-9a-f]{64}', audio_id):
+        return jsonify({'success': False, 'message': 'Audio not found'}), 404
+    audio_path = tts_cache.get(audio_id[len('tts_'):])
+    if not audio_path:
+        return jsonify({'success': False, 'message': 'Audio not found'}), 404
+    return jsonify({'success': True, 'data': {'audio_id': audio_id, **audio_analysis(audio_path)}})
+
+def set_audio_headers(response, filename, cache_status):
+    response.headers['X-Audio-Id'] = filename[:-4]
+    response.headers['X-Audio-Url'] = f"/audio/{filename}"
+    response.headers['X-Audio-Cache'] = cache_status
+    response.headers['Access-Control-Expose-Headers'] = 'X-Audio-Id, X-Audio-Url, X-Audio-Cache, X-Audio-Duration'
+    return response
+
 @voices_bp.route('/generate', methods=['POST'])
 def generate_voice():
-    """Generate speech from text using ElevenLabs"""
+    """
+    Generate speech from text using ElevenLabs (served from the TTS cache when possible).
+
+    With ``Accept: text/event-stream`` the response is an SSE stream of
+    ``segment`` events as long scripts are synthesized, then ``done`` with
+    the usual response data (or ``error``). With ``"async": true`` (or
+    ``?async=1``) the synthesis is queued and a job is returned right away;
+    follow it at /jobs/<job_id> or /jobs/<job_id>/events.
+    """
     try:
         data = request.get_json()
         
@@ -285,130 +337,344 @@ def generate_voice():
                     'message': f'Missing required field: {field}'
                 }), 400
         
-        if not ELEVENLABS_API_KEY:
-            return jsonify({'success': False, 'message': 'ELEVENLABS_API_KEY not set on server'}), 400
-        endpoint = f"{ELEVEN_API_BASE}/text-to-speech/{data['voice_id']}/stream"
-        headers = {'xi-api-key': ELEVENLABS_API_KEY, 'Content-Type': 'application/json'}
-        payload = {'text': data['text'], 'model_id': data.get('model_id', 'eleven_monolingual_v1')}
-        if data.get('voice_settings'):
-            payload['voice_settings'] = data['voice_settings']
-        resp = requests.post(endpoint, headers=headers, json=payload, stream=True)
-        if not resp.ok:
-            return jsonify({'success': False, 'message': resp.text}), resp.status_code
-        static_dir = (Path(__file__).resolve().parent.parent / 'static').resolve()
-        audio_dir = static_dir / 'audio'
-        audio_dir.mkdir(parents=True, exist_ok=True)
-        filename = f"tts_{int(datetime.utcnow().timestamp())}_{data['voice_id']}.mp3"
-        with open(audio_dir / filename, 'wb') as f:
-            for chunk in resp.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
+        if data.get('async') or request.args.get('async') in ('1', 'true'):
+            current_user = get_current_user_from_token()
+            if not current_user:
+                return jsonify({'success': False, 'message': 'Authentication required'}), 401
+            return enqueue_generation(data, current_user)
+
+        if 'text/event-stream' in request.headers.get('Accept', ''):
+            return stream_generation_progress(data)
+
+        audio_path, cached, segments = produce_audio(data)
         # build absolute url so frontend on different origin can stream audio directly
         base = request.host_url.rstrip('/')
         return jsonify({
             'success': True,
-            'data': {
-                'audio_id': filename[:-4],
-                'audio_url': f"/audio/{filename}",
-                'audio_url_absolute': f"{base}/audio/{filename}",
-                'duration': None,
-                'voice_id': data['voice_id'],
-                'text': data['text']
-            }
+            'data': audio_payload(data, audio_path, cached, segments, base)
         })
         
+    except SynthesisError as e:
+        return jsonify({'success': False, 'message': str(e)}), e.status_code
     except Exception as e:
         return jsonify({
             'success': False,
             'message': str(e)
         }), 500
 
-@voices_bp.route('/clone', methods=['POST'])
-def clone_voice():
+def enqueue_generation(data, user):
+    """Persist a queued VoiceGenerationJob for ``user`` and hand it to the worker pool"""
+    job = VoiceGenerationJob(
+        user_id=user.id,
+        voice_id=data['voice_id'],
+        status='queued',
+        params={field: data[field] for field in ('text', 'voice_id', 'model_id', 'voice_settings') if field in data}
+    )
+    db.session.add(job)
+    db.session.commit()
+    tts_job_queue.enqueue(job.id)
+
+    return jsonify({
+        'success': True,
+        'data': {
+            **job.to_dict(),
+            'status_url': f"/api/voices/jobs/{job.id}",
+            'events_url': f"/api/voices/jobs/{job.id}/events"
+        }
+    }), 202
+
+def job_payload(job):
+    data = job.to_dict()
+    if job.audio_url:
+        data['audio_url_absolute'] = f"{request.host_url.rstrip('/')}{job.audio_url}"
+        audio_path = tts_cache.directory / job.audio_url.rsplit('/', 1)[-1]
+        if audio_path.exists():
+            analysis = audio_analysis(audio_path)
+            data['duration'] = analysis['duration']
+            data['waveform'] = analysis['waveform']
+            data['waveform_resolution'] = analysis['waveform_resolution']
+    return data
+
+@voices_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_generation_job(job_id):
+    """Status of one of the current user's background synthesis jobs"""
+    try:
+        current_user = get_current_user_from_token()
+        if not current_user:
+            return jsonify({'success': False, 'message': 'Authentication required'}), 401
+
+        job = VoiceGenerationJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+        if not job:
+            return jsonify({'success': False, 'message': 'Job not found'}), 404
+        return jsonify({'success': True, 'data': job_payload(job)})
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+@voices_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_generation_job(job_id, keepalive_seconds=15):
+    """
+    SSE stream of a background synthesis job: its current status, a
+    ``status`` event per change (including each finished segment), then
+    ``done`` once it completes or fails. EventSource cannot send headers,
+    so the token may be passed as ``?token=``.
     """
-    Clone a new voice in ElevenLabs.
+    current_user = get_current_user_from_token_or_query()
+    if not current_user:
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+
+    topic = tts_job_topic(job_id)
+    # Subscribe before taking the snapshot so no transition can fall in between
+    subscriber = tts_job_events.subscribe(topic)
+    try:
+        job = VoiceGenerationJob.query.filter_by(id=job_id, user_id=current_user.id).first()
+        if not job:
+            tts_job_events.unsubscribe(subscriber, topic)
+            return jsonify({'success': False, 'message': 'Job not found'}), 404
+        snapshot = job_payload(job)
+    except Exception as e:
+        tts_job_events.unsubscribe(subscriber, topic)
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+    base = request.host_url.rstrip('/')
+
+    def generate():
+        event = snapshot
+        yield format_sse(event)
+        while event['status'] not in TERMINAL_JOB_STATUSES:
+            try:
+                event = subscriber.get(timeout=keepalive_seconds)
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            if event.get('audio_url'):
+                event = {**event, 'audio_url_absolute': f"{base}{event['audio_url']}"}
+            yield format_sse(event)
+        yield format_sse({'job_id': job_id}, event_name='done')
+
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.call_on_close(lambda: tts_job_events.unsubscribe(subscriber, topic))
+    return response
+
+def stream_generation_progress(data):
+    """Run produce_audio on a worker thread and relay its segment progress as Server-Sent Events"""
+    events = queue.Queue()
+    base = request.host_url.rstrip('/')
+
+    def work():
+        try:
+            audio_path, cached, segments = produce_audio(data, on_progress=lambda e: events.put(('segment', e)))
+            events.put(('done', audio_payload(data, audio_path, cached, segments, base)))
+        except Exception as e:
+            events.put(('error', {
+                'status_code': getattr(e, 'status_code', 500),
+                'message': str(e)
+            }))
+
+    threading.Thread(target=work, name='tts-progress', daemon=True).start()
 
-    Supports two request types:
-      • multipart/form-data  -> real cloning (needs audio files)
-      • application/json     -> mock path retained for backward-compat tests
+    def generate():
+        while True:
+            name, event = events.get()
+            yield format_sse(event, name)
+            if name != 'segment':
+                return
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@voices_bp.route('/generate/stream', methods=['GET', 'POST'])
+def stream_voice():
+    """
+    Stream speech to the client while ElevenLabs synthesizes it.
+
+    Audio bytes are forwarded as they arrive (chunked transfer), so playback
+    can start after the upstream first byte rather than the whole synthesis,
+    and are written to the TTS cache at the same time. The cached copy is
+    only published once the stream completes; X-Audio-Url names it. A cache
+    hit is served straight from disk.
+
+    GET takes text and voice_id as query parameters so an <audio> element
+    can use this URL as its src; POST takes the same JSON as /generate.
     """
     try:
+        data = request.args if request.method == 'GET' else (request.get_json(silent=True) or {})
+
+        # Validate required fields
+        for field in ['text', 'voice_id']:
+            if not data.get(field):
+                return jsonify({
+                    'success': False,
+                    'message': f'Missing required field: {field}'
+                }), 400
+
+        key = synthesis_key(data)
+        audio_path = tts_cache.get(key)
+        if audio_path:
+            response = send_file(audio_path, mimetype='audio/mpeg', conditional=True)
+            response.headers['X-Audio-Duration'] = str(audio_analysis(audio_path)['duration'])
+            return set_audio_headers(response, audio_path.name, 'HIT')
+
         if not ELEVENLABS_API_KEY:
             return jsonify({'success': False, 'message': 'ELEVENLABS_API_KEY not set on server'}), 400
+        resp = open_tts_stream(data)
+        if not resp.ok:
+            return jsonify({'success': False, 'message': resp.text}), resp.status_code
+
+        partial_path = partial_audio_path(key)
+
+        def generate():
+            analyzer = Mp3Analyzer()
+            try:
+                with open(partial_path, 'wb') as f:
+                    # chunk_size=None yields each chunk as soon as it is received
+                    for chunk in resp.iter_content(chunk_size=None):
+                        if chunk:
+                            f.write(chunk)
+                            analyzer.feed(chunk)
+                            yield chunk
+                tts_cache.put(key, partial_path, analyzer.result())
+            finally:
+                # Client disconnects land here too; never publish a truncated file
+                resp.close()
+                partial_path.unlink(missing_ok=True)
+
+        response = Response(generate(), mimetype=resp.headers.get('Content-Type', 'audio/mpeg'))
+        response.headers['Cache-Control'] = 'no-store'
+        response.headers['X-Accel-Buffering'] = 'no'  # Don't let a reverse proxy buffer the stream
+        return set_audio_headers(response, tts_cache.filename(key), 'MISS')
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+def get_current_user_from_token():
+    """Helper function to get current user from JWT token"""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+
+    user_id = verify_token(auth_header.split(' ')[1])
+    return User.query.get(user_id) if user_id else None
+
+def get_current_user_from_token_or_query():
+    """Like get_current_user_from_token, but also accepts ?token= for EventSource clients"""
+    user = get_current_user_from_token()
+    if user:
+        return user
+
+    user_id = verify_token(request.args.get('token', ''))
+    return User.query.get(user_id) if user_id else None
+
+@voices_bp.route('/clone', methods=['POST'])
+def clone_voice():
+    """
+    Clone a new voice from uploaded samples (multipart/form-data: name,
+    description, files).
 
-        # ------------------------------------------------------------------
-        # Real cloning – multipart form with files
-        # ------------------------------------------------------------------
-        if request.content_type and 'multipart/form-data' in request.content_type:
-            name = request.form.get('name')
-            description = request.form.get('description', '')
-            files = request.files.getlist('files') or []
+    The samples are stored and a 'pending' VoiceClone is returned right
+    away (202); the upload to ElevenLabs and the preview render happen in
+    the background. Follow progress at /clones/<clone_id>.
+    """
+    try:
+        current_user = get_current_user_from_token()
+        if not current_user:
+            return jsonify({'success': False, 'message': 'Authentication required'}), 401
 
+        if not (request.content_type and 'multipart/form-data' in request.content_type):
+            return jsonify({
+                'success': False,
+                'message': 'Upload audio samples as multipart/form-data'
+            }), 400
+
+        # Samples are size-checked as they arrive and spooled to disk, not read into memory
+        try:
+            form, files = parse_sample_upload(request.environ)
+        except UploadTooLarge as e:
+            return jsonify({'success': False, 'message': e.description}), 413
+        except RequestEntityTooLarge:
+            return jsonify({
+                'success': False,
+                'message': f'Upload exceeds the {CLONE_MAX_TOTAL_BYTES // (1024 * 1024)} MB limit'
+            }), 413
+
+        try:
+            name = form.get('name')
             if not name:
                 return jsonify({'success': False, 'message': 'Missing required field: name'}), 400
             if not files:
                 return jsonify({'success': False, 'message': 'Please upload at least one audio file'}), 400
 
-            # Build multipart payload for ElevenLabs
-            upstream_files = []
-            for f in files:
-                # read may exhaust stream; try stream.read first else f.read
-                try:
-                    upstream_files.append(
-                        ('files', (f.filename, f.stream.read(), f.mimetype or 'audio/mpeg'))
-                    )
-                except Exception:
-                    upstream_files.append(
-                        ('files', (f.filename, f.read(), f.mimetype or 'audio/mpeg'))
-                    )
-
-            data = {'name': name}
-            if description:
-                data['description'] = description
-
-            r = requests.post(
-                f"{ELEVEN_API_BASE}/voices/add",
-                headers={'xi-api-key': ELEVENLABS_API_KEY},
-                data=data,
-                files=upstream_files,
-                timeout=60,
+            clone = VoiceClone(
+                user_id=current_user.id,
+                name=name,
+                description=form.get('description') or None,
+                ai_service='elevenlabs',
+                status='pending'
             )
+            db.session.add(clone)
+            db.session.flush()
+            clone.sample_files = save_samples(files, voice_clone_queue.samples_dir_for(clone.id))
+            db.session.commit()
+        finally:
+            for f in files:
+                f.close()
 
-            if not r.ok:
-                return jsonify({'success': False, 'message': r.text}), r.status_code
-
-            payload = r.json()
-            voice_id = payload.get('voice_id') or payload.get('id')
-
-            return jsonify({
-                'success': True,
-                'data': {
-                    'voice_id': voice_id,
-                    'name': name,
-                    'status': payload.get('status', 'created')
-                }
-            })
-
-        # ------------------------------------------------------------------
-        # Fallback JSON mock cloning (kept for earlier callers / tests)
-        # ------------------------------------------------------------------
-        data = request.get_json(silent=True) or {}
-
-        required_fields = ['name', 'description']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'success': False, 'message': f'Missing required field: {field}'}), 400
-
-        voice_id = f"cloned_voice_{int(datetime.utcnow().timestamp())}"
+        voice_clone_queue.enqueue(clone.id)
         return jsonify({
             'success': True,
             'data': {
-                'voice_id': voice_id,
-                'name': data['name'],
-                'description': data['description'],
-                'status': 'processing'
+                **clone_payload(clone),
+                'status_url': f"/api/voices/clones/{clone.id}"
             }
-        })
+        }), 202
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+def clone_payload(clone):
+    """A clone as returned to its owner; ``voice_id`` is what /generate takes (None until ready)"""
+    return {**clone.to_dict(), 'voice_id': clone.voice_id_external}
+
+@voices_bp.route('/clones', methods=['GET'])
+def list_voice_clones():
+    """The current user's voice clones, newest first"""
+    try:
+        current_user = get_current_user_from_token()
+        if not current_user:
+            return jsonify({'success': False, 'message': 'Authentication required'}), 401
+
+        clones = VoiceClone.query.filter_by(user_id=current_user.id).order_by(VoiceClone.created_at.desc()).all()
+        return jsonify({'success': True, 'data': [clone_payload(clone) for clone in clones]})
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@voices_bp.route('/clones/<clone_id>', methods=['GET'])
+def get_voice_clone(clone_id):
+    """Status of one of the current user's voice clones"""
+    try:
+        current_user = get_current_user_from_token()
+        if not current_user:
+            return jsonify({'success': False, 'message': 'Authentication required'}), 401
+
+        clone = VoiceClone.query.filter_by(id=clone_id, user_id=current_user.id).first()
+        if not clone:
+            return jsonify({'success': False, 'message': 'Voice clone not found'}), 404
+        return jsonify({'success': True, 'data': clone_payload(clone)})
 
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -0,0 +1,278 @@
+"""
+Video Pipeline Load Test
+Drives /api/videos/generate, /api/videos/bulk-generate and the status
+endpoints of a running backend with bounded concurrency, then reports
+throughput and p50/p95/p99 latency per endpoint.
+
+Run the backend against the mock provider (tools/mock_pollo_server.py) so
+no credits are spent, then:
+
+    python tools/load_test.py --base-url http://127.0.0.1:5002 --scenario mixed \\
+        --requests 2000 --concurrency 100
+
+Without --token a throwaway account is registered. It cannot afford bulk
+generation, so the bulk scenario requires --token with a funded account and
+the mixed scenario leaves bulk requests out unless one is given.
+--wait additionally polls every created video to a terminal status and
+reports end-to-end render turnaround.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+SCRIPTS = [
+    "Tired of spending hours on video ads? Meet the fastest way to create them.",
+    "Here is why thousands of founders switched their morning routine.",
+    "Stop scrolling. This one product changed how I work from home.",
+]
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted sample"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+@dataclass
+class Recorder:
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    statuses: Dict[str, Counter] = field(default_factory=lambda: defaultdict(Counter))
+    turnaround: List[float] = field(default_factory=list)
+    outcomes: Counter = field(default_factory=Counter)
+
+    def record(self, endpoint: str, seconds: float, status: int):
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+
+    def report(self, elapsed: float) -> str:
+        lines = [
+            f"{'endpoint':<28}{'count':>8}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        ]
+        total = 0
+        for endpoint, samples in sorted(self.latencies.items()):
+            errors = sum(n for code, n in self.statuses[endpoint].items() if code >= 400 or code == 0)
+            total += len(samples)
+            lines.append(
+                f"{endpoint:<28}{len(samples):>8}{errors:>8}{len(samples) / elapsed:>9.1f}"
+                f"{percentile(samples, 50) * 1000:>9.1f}{percentile(samples, 95) * 1000:>9.1f}"
+                f"{percentile(samples, 99) * 1000:>9.1f}"
+            )
+        lines.append(f"\n{total} requests in {elapsed:.2f}s ({total / elapsed:.1f} req/s)")
+        for endpoint, codes in sorted(self.statuses.items()):
+            lines.append(f"  {endpoint}: " + ", ".join(f"{code}x{n}" for code, n in sorted(codes.items())))
+        if self.turnaround:
+            lines.append(
+                f"\nrender turnaround over {len(self.turnaround)} videos: "
+                f"p50 {percentile(self.turnaround, 50):.1f}s, p95 {percentile(self.turnaround, 95):.1f}s, "
+                f"p99 {percentile(self.turnaround, 99):.1f}s ({dict(self.outcomes)})"
+            )
+        return "\n".join(lines)
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.base = args.base_url.rstrip('/')
+        self.recorder = Recorder()
+        self.video_ids: List[str] = []
+        self.created_at: Dict[str, float] = {}
+        self.headers: Dict[str, str] = {}
+        self.project_id: Optional[str] = None
+        self.session: Optional[ClientSession] = None
+        self._run_id = uuid.uuid4().hex[:8]
+        self._counter = itertools.count()
+
+    async def call(self, endpoint: Optional[str], method: str, path: str, **kwargs):
+        """Send one request; ``endpoint`` labels it in the report (None leaves it out)"""
+        started = time.perf_counter()
+        try:
+            async with self.session.request(method, f"{self.base}{path}", headers=self.headers, **kwargs) as response:
+                body = await response.json(content_type=None)
+                status = response.status
+        except Exception:
+            body, status = None, 0
+        if endpoint:
+            self.recorder.record(endpoint, time.perf_counter() - started, status)
+        return status, body
+
+    async def setup(self):
+        if self.args.token:
+            self.headers = {"Authorization": f"Bearer {self.args.token}"}
+        else:
+            email = f"loadtest+{self._run_id}@example.com"
+            password = uuid.uuid4().hex
+            async with self.session.post(f"{self.base}/api/auth/register", json={
+                "email": email, "password": password, "first_name": "Load", "last_name": "Test"
+            }):
+                pass
+            async with self.session.post(f"{self.base}/api/auth/login",
+                                         json={"email": email, "password": password}) as response:
+                body = await response.json(content_type=None)
+            if not body or not body.get('success'):
+                sys.exit(f"Could not obtain a token: {body}")
+            self.headers = {"Authorization": f"Bearer {body['data']['token']}"}
+
+        if self.args.scenario == 'bulk' or (self.args.scenario == 'mixed' and self.args.token):
+            async with self.session.post(f"{self.base}/api/projects/", headers=self.headers,
+                                         json={"name": f"Load test {self._run_id}"}) as response:
+                body = await response.json(content_type=None)
+            self.project_id = body['data']['project_id']
+
+    def _script(self) -> str:
+        # Unique per request so duplicate detection does not short-circuit the pipeline
+        return f"{random.choice(SCRIPTS)} [{self._run_id}-{next(self._counter)}]"
+
+    def _track(self, video_id: str):
+        self.video_ids.append(video_id)
+        self.created_at[video_id] = time.time()
+
+    async def generate(self):
+        status, body = await self.call("POST /generate", "POST", "/api/videos/generate", json={
+            "script": self._script(),
+            "model_id": self.args.model,
+            "actor_id": "load-test-actor",
+            "voice_id": "load-test-voice",
+            "duration": 5
+        })
+        if status in (200, 202):
+            self._track(body['data']['video_id'])
+
+    async def bulk_generate(self):
+        status, body = await self.call("POST /bulk-generate", "POST", "/api/videos/bulk-generate", json={
+            "project_id": self.project_id,
+            "script": self._script(),
+            "variations": [{"model": self.args.model, "script": self._script()}
+                           for _ in range(self.args.bulk_size)]
+        })
+        if status == 202:
+            for video_id in body['data']['generation_ids']:
+                self._track(video_id)
+            bulk_job_id = body['data']['bulk_job_id']
+            await self.call("GET /bulk/<id>", "GET", f"/api/videos/bulk/{bulk_job_id}")
+
+    async def check_status(self):
+        if not self.video_ids:
+            return await self.generate()
+        video_id = random.choice(self.video_ids)
+        await self.call("GET /<id>/status", "GET", f"/api/videos/{video_id}/status")
+
+    def _operations(self):
+        scenario = self.args.scenario
+        if scenario == 'generate':
+            return [self.generate]
+        if scenario == 'bulk':
+            return [self.bulk_generate]
+        if scenario == 'status':
+            return [self.check_status]
+        # Mixed: mostly status reads, as clients poll far more than they submit
+        operations = [self.generate] * 2 + [self.check_status] * 7
+        if not self.args.token:
+            print("Skipping bulk requests: the throwaway account cannot afford them (pass --token)",
+                  file=sys.stderr)
+            return operations
+        return operations + [self.bulk_generate]
+
+    async def run_requests(self):
+        operations = self._operations()
+        if self.args.scenario == 'status':
+            # Seed some videos to read back
+            await asyncio.gather(*(self.generate() for _ in range(min(self.args.concurrency, 50))))
+
+        remaining = itertools.count()
+
+        async def worker():
+            while next(remaining) < self.args.requests:
+                await random.choice(operations)()
+
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+
+    async def wait_for_renders(self):
+        """Poll every created video to a terminal status and record its turnaround"""
+        pending = set(self.video_ids)
+        deadline = time.time() + self.args.wait_timeout
+        while pending and time.time() < deadline:
+            ids = list(pending)
+            results = await asyncio.gather(*(
+                self.call(None, "GET", f"/api/videos/{video_id}/status")
+                for video_id in ids
+            ))
+            for video_id, (status, body) in zip(ids, results):
+                state = body and body.get('data', {}).get('status')
+                if state in ('completed', 'failed'):
+                    pending.discard(video_id)
+                    self.recorder.turnaround.append(time.time() - self.created_at[video_id])
+                    self.recorder.outcomes[state] += 1
+            await asyncio.sleep(self.args.poll_interval)
+        self.recorder.outcomes['timed_out'] += len(pending)
+
+    async def run(self) -> str:
+        connector = TCPConnector(limit=self.args.concurrency)
+        async with ClientSession(connector=connector, timeout=ClientTimeout(total=self.args.timeout)) as session:
+            self.session = session
+            await self.setup()
+            started = time.perf_counter()
+            await self.run_requests()
+            elapsed = time.perf_counter() - started
+            report = self.recorder.report(elapsed)
+            if self.args.wait and self.video_ids:
+                await self.wait_for_renders()
+                report = self.recorder.report(elapsed)
+        return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the video generation pipeline")
+    parser.add_argument('--base-url', default='http://127.0.0.1:5002')
+    parser.add_argument('--token', help="bearer token; a throwaway account is registered if omitted")
+    parser.add_argument('--scenario', choices=('generate', 'bulk', 'status', 'mixed'), default='mixed')
+    parser.add_argument('--requests', type=int, default=500, help="total requests to send")
+    parser.add_argument('--concurrency', type=int, default=50, help="requests in flight")
+    parser.add_argument('--bulk-size', type=int, default=10, help="variations per bulk request")
+    parser.add_argument('--model', default='kling-1.6')
+    parser.add_argument('--timeout', type=float, default=60, help="per-request timeout, seconds")
+    parser.add_argument('--wait', action='store_true', help="poll created videos to completion")
+    parser.add_argument('--wait-timeout', type=float, default=600)
+    parser.add_argument('--poll-interval', type=float, default=2)
+    parser.add_argument('--json', action='store_true', help="print the summary as JSON")
+    args = parser.parse_args()
+    if args.scenario == 'bulk' and not args.token:
+        parser.error("--scenario bulk needs --token for an account with enough credits")
+
+    test = LoadTest(args)
+    report = asyncio.run(test.run())
+    if args.json:
+        summary = {
+            endpoint: {
+                "count": len(samples),
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "p99": percentile(samples, 99),
+                "statuses": dict(test.recorder.statuses[endpoint])
+            }
+            for endpoint, samples in test.recorder.latencies.items()
+        }
+        if test.recorder.turnaround:
+            summary["render_turnaround"] = {
+                "count": len(test.recorder.turnaround),
+                "p50": percentile(test.recorder.turnaround, 50),
+                "p95": percentile(test.recorder.turnaround, 95),
+                "p99": percentile(test.recorder.turnaround, 99),
+                "outcomes": dict(test.recorder.outcomes)
+            }
+        print(json.dumps(summary, indent=2))
+    else:
+        print(report)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""
+Mock Pollo AI Server
+Local stand-in for the Pollo AI API with configurable latency, error rates
+and render durations, for exercising the real client code path without
+spending provider credits.
+
+Run it and point the backend at it (any non-empty key selects the real client over the demo stub):
+
+    python tools/mock_pollo_server.py --port 8900 --latency-ms 120 --error-rate 0.02
+    POLLO_API_KEY=mock POLLO_API_BASE=http://127.0.0.1:8900 python src/main.py
+
+Renders complete (or fail, see --failure-rate) after a random duration
+between --render-min and --render-max seconds. When a submission carries a
+webhook_url the server delivers the completion callback, signed with
+--webhook-secret in the same format as Pollo AI (X-Pollo-Signature).
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from aiohttp import ClientSession, ClientTimeout, web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.routes.pollo_demo import DEMO_MODELS
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 50
+    jitter_ms: float = 25
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    render_min: float = 20
+    render_max: float = 60
+    failure_rate: float = 0.0
+    webhook_secret: Optional[str] = None
+
+@dataclass
+class MockTask:
+    task_id: str
+    model: str
+    created_at: float
+    render_seconds: float
+    fails: bool
+    webhook_url: Optional[str] = None
+
+    def state(self, now: float) -> Dict:
+        elapsed = now - self.created_at
+        if elapsed < self.render_seconds:
+            progress = min(int(elapsed / self.render_seconds * 100), 99)
+            return {
+                "task_id": self.task_id,
+                "status": "processing",
+                "progress": progress,
+                "message": f"Generating video... {progress}% complete"
+            }
+        if self.fails:
+            return {
+                "task_id": self.task_id,
+                "status": "failed",
+                "progress": 100,
+                "message": "Render failed (simulated)"
+            }
+        return {
+            "task_id": self.task_id,
+            "status": "completed",
+            "progress": 100,
+            "message": "Video generation completed successfully",
+            "video_url": f"https://mock-videos.pollo.local/{self.task_id}.mp4",
+            "thumbnail_url": f"https://mock-videos.pollo.local/{self.task_id}_thumb.jpg",
+            "file_size_bytes": 15_000_000
+        }
+
+@dataclass
+class MockPolloServer:
+    config: MockConfig
+    tasks: Dict[str, MockTask] = field(default_factory=dict)
+    requests: Counter = field(default_factory=Counter)
+    injected: Counter = field(default_factory=Counter)
+    webhooks: Counter = field(default_factory=Counter)
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._simulate_network])
+        app.router.add_get('/models', self.models)
+        app.router.add_post('/videos/generate', self.generate)
+        app.router.add_get('/videos/status', self.batch_status)
+        app.router.add_get('/videos/{task_id}/status', self.status)
+        app.router.add_get('/videos/{task_id}', self.result)
+        app.router.add_get('/_mock/stats', self.stats)
+        app.on_startup.append(self._open_webhook_session)
+        app.on_cleanup.append(self._close_webhook_session)
+        return app
+
+    @web.middleware
+    async def _simulate_network(self, request: web.Request, handler):
+        if request.path.startswith('/_mock/'):
+            return await handler(request)
+
+        resource = request.match_info.route.resource
+        self.requests[f"{request.method} {resource.canonical if resource else request.path}"] += 1
+        delay = self.config.latency_ms + random.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+        await asyncio.sleep(max(delay, 0) / 1000)
+
+        roll = random.random()
+        if roll < self.config.rate_limit_rate:
+            self.injected['429'] += 1
+            return web.json_response({"error": "Rate limit exceeded"}, status=429, headers={"Retry-After": "1"})
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            self.injected['5xx'] += 1
+            return web.json_response({"error": "Upstream error (simulated)"}, status=random.choice((500, 502, 503)))
+        return await handler(request)
+
+    async def models(self, request: web.Request) -> web.Response:
+        return web.json_response({"models": DEMO_MODELS})
+
+    async def generate(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        if not payload.get("prompt") or not payload.get("model"):
+            return web.json_response({"error": "prompt and model are required"}, status=400)
+
+        task = MockTask(
+            task_id=f"mock_{uuid.uuid4().hex}",
+            model=payload["model"],
+            created_at=time.time(),
+            render_seconds=random.uniform(self.config.render_min, self.config.render_max),
+            fails=random.random() < self.config.failure_rate,
+            webhook_url=payload.get("webhook_url")
+        )
+        self.tasks[task.task_id] = task
+        if task.webhook_url:
+            asyncio.create_task(self._deliver_webhook(request.app, task))
+
+        return web.json_response({
+            "task_id": task.task_id,
+            "status": "processing",
+            "estimated_completion": task.created_at + task.render_seconds
+        })
+
+    async def status(self, request: web.Request) -> web.Response:
+        task = self.tasks.get(request.match_info['task_id'])
+        if not task:
+            return web.json_response({"error": "Task not found"}, status=404)
+        return web.json_response(task.state(time.time()))
+
+    async def batch_status(self, request: web.Request) -> web.Response:
+        now = time.time()
+        ids = [i for i in request.query.get('ids', '').split(',') if i]
+        return web.json_response({
+            "videos": [self.tasks[i].state(now) for i in ids if i in self.tasks]
+        })
+
+    async def result(self, request: web.Request) -> web.Response:
+        task = self.tasks.get(request.match_info['task_id'])
+        if not task:
+            return web.json_response({"error": "Task not found"}, status=404)
+        return web.json_response({**task.state(time.time()), "model_used": task.model, "duration": 5})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        now = time.time()
+        return web.json_response({
+            "requests": dict(self.requests),
+            "injected_errors": dict(self.injected),
+            "webhooks": dict(self.webhooks),
+            "tasks": len(self.tasks),
+            "tasks_in_flight": sum(1 for t in self.tasks.values() if now - t.created_at < t.render_seconds)
+        })
+
+    async def _open_webhook_session(self, app: web.Application):
+        app['webhook_session'] = ClientSession(timeout=ClientTimeout(total=10))
+
+    async def _close_webhook_session(self, app: web.Application):
+        await app['webhook_session'].close()
+
+    async def _deliver_webhook(self, app: web.Application, task: MockTask, attempts: int = 5):
+        """POST the final state to the task's webhook_url, retrying non-2xx like Pollo AI"""
+        await asyncio.sleep(task.render_seconds)
+        body = json.dumps(task.state(time.time())).encode()
+        headers = {"Content-Type": "application/json"}
+        if self.config.webhook_secret:
+            digest = hmac.new(self.config.webhook_secret.encode(), body, hashlib.sha256).hexdigest()
+            headers["X-Pollo-Signature"] = f"sha256={digest}"
+
+        for attempt in range(attempts):
+            try:
+                async with app['webhook_session'].post(task.webhook_url, data=body, headers=headers) as response:
+                    if response.status < 300:
+                        self.webhooks['delivered'] += 1
+                        return
+            except Exception:
+                pass
+            await asyncio.sleep(2 ** attempt)
+        self.webhooks['abandoned'] += 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Pollo AI API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=float, default=50, help="mean added latency per request")
+    parser.add_argument('--jitter-ms', type=float, default=25, help="uniform +/- jitter on the latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 5xx")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="fraction answered with 429")
+    parser.add_argument('--render-min', type=float, default=20, help="shortest simulated render, seconds")
+    parser.add_argument('--render-max', type=float, default=60, help="longest simulated render, seconds")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="fraction of renders that end failed")
+    parser.add_argument('--webhook-secret', default=os.environ.get('POLLO_WEBHOOK_SECRET'))
+    args = parser.parse_args()
+
+    server = MockPolloServer(MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        render_min=args.render_min,
+        render_max=max(args.render_max, args.render_min),
+        failure_rate=args.failure_rate,
+        webhook_secret=args.webhook_secret
+    ))
+    web.run_app(server.build_app(), host=args.host, port=args.port)
+
+if __name__ == '__main__':
+    main()
@@ -342,27 +342,22 @@ const VoiceLibrary = () => {
   };
 
   const handleSelectVoice = async (voice) => {
-    // Generate a short TTS sample so the user hears the selected voice in action
+    // Stream a short TTS sample so playback starts as soon as the first audio arrives
     setGeneratingId(voice.id);
     try {
-      const resp = await api.generateVoice({
+      const params = new URLSearchParams({
         text: 'This is a sample generated by VidCraft.',
         voice_id: voice.id,
       });
-
-      if (resp?.success && resp?.data?.audio_url_absolute) {
-        if (!audioRef.current) {
-          audioRef.current = new Audio();
-          audioRef.current.onended = () => setPlayingVoice(null);
-        }
-        audioRef.current.pause();
-        audioRef.current.src = resp.data.audio_url_absolute;
-        audioRef.current.load();
-        await audioRef.current.play().catch(() => {});
-        setPlayingVoice(voice.id);
-      } else {
-        alert(resp?.message || 'Failed to generate audio sample.');
+      if (!audioRef.current) {
+        audioRef.current = new Audio();
+        audioRef.current.onended = () => setPlayingVoice(null);
       }
+      audioRef.current.pause();
+      audioRef.current.src = `${API_BASE}/voices/generate/stream?${params}`;
+      audioRef.current.load();
+      await audioRef.current.play();
+      setPlayingVoice(voice.id);
     } catch (e) {
       console.error('Voice generation error', e);
       alert('Voice generation failed. Please try again.');
@@ -21,6 +21,15 @@ class ApiService {
       timeout: 30000, // 30 seconds timeout
     })
 
+    // Attach auth token so user-scoped endpoints (e.g. video generation) work
+    this.client.interceptors.request.use((config) => {
+      const token = localStorage.getItem('authToken')
+      if (token) {
+        config.headers.Authorization = `Bearer ${token}`
+      }
+      return config
+    })
+
     // Add response interceptor for error handling
     this.client.interceptors.response.use(
       (response) => response.data,
@@ -89,9 +98,24 @@ class ApiService {
     return this.client.get(`/actors/${actorId}`)
   }
 
-  // Voices
-  async getVoices() {
-    return this.client.get('/voices')
+  // Voices (the backend paginates; without an explicit page every page is fetched)
+  async getVoices(params = {}) {
+    if (params.page) {
+      return this.client.get('/voices', { params })
+    }
+    const pageParams = { ...params, limit: 100 }
+    const first = await this.client.get('/voices', { params: pageParams })
+    const totalPages = first?.data?.pagination?.total_pages || 1
+    if (totalPages <= 1) {
+      return first
+    }
+    const rest = await Promise.all(
+      Array.from({ length: totalPages - 1 }, (_, i) =>
+        this.client.get('/voices', { params: { ...pageParams, page: i + 2 } })
+      )
+    )
+    const voices = [first, ...rest].flatMap((res) => res?.data?.voices || [])
+    return { ...first, data: { ...first.data, voices } }
   }
 
   async generateVoice(voiceData) {
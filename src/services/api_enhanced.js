@@ -5,8 +5,41 @@ const API_BASE_URL =
   (import.meta?.env?.VITE_API_BASE_URL) ||
   'https://9yhyi3c8539k.manus.space/api';
 
+const ANALYTICS_BATCH_SIZE = 20;
+const ANALYTICS_FLUSH_MS = 2000;
+const ANALYTICS_MAX_QUEUE = 500;
+const ANALYTICS_RETRY_BASE_MS = 2000;
+const ANALYTICS_RETRY_MAX_MS = 5 * 60 * 1000;
+
+// Retry-After is either delta-seconds or an HTTP date
+const retryAfterMs = (value) => {
+  if (!value) return null;
+  const seconds = Number(value);
+  if (Number.isFinite(seconds)) return Math.max(0, seconds * 1000);
+  const at = Date.parse(value);
+  return Number.isNaN(at) ? null : Math.max(0, at - Date.now());
+};
+
+const newEventId = () =>
+  globalThis.crypto?.randomUUID?.() ||
+  'xxxxxxxx-xxxx-4xxx-yxxx-xxxxxxxxxxxx'.replace(/[xy]/g, (c) => {
+    const r = (Math.random() * 16) | 0;
+    return (c === 'x' ? r : (r & 0x3) | 0x8).toString(16);
+  });
+
 class ApiService {
   constructor() {
+    this.analyticsQueue = [];
+    this.analyticsTimer = null;
+    this.analyticsFlushing = false;
+    this.analyticsFailures = 0;
+    this.analyticsRetryAt = 0;
+    if (typeof document !== 'undefined') {
+      document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden') this.flushEvents({ keepalive: true });
+      });
+    }
+
     this.client = axios.create({
       baseURL: API_BASE_URL,
       headers: {
@@ -190,13 +223,106 @@ class ApiService {
     }
   }
 
-  async trackEvent(eventData) {
+  // Events are buffered and sent to /analytics/track/batch: when ANALYTICS_BATCH_SIZE
+  // events are waiting, ANALYTICS_FLUSH_MS after the first one, and when the page is
+  // hidden. Each carries an event_id (so a retried batch is not double counted) and the
+  // time it happened. Failed batches are retried after the server's Retry-After, or
+  // with capped, jittered exponential backoff; nothing is sent until then.
+  trackEvent(eventData) {
+    this.analyticsQueue.push({
+      event_id: newEventId(),
+      timestamp: Date.now(),
+      page_url: typeof window !== 'undefined' ? window.location.pathname : undefined,
+      ...eventData,
+    });
+    this.trimAnalyticsQueue();
+
+    if (this.analyticsQueue.length >= ANALYTICS_BATCH_SIZE && !this.analyticsBackingOff()) {
+      this.flushEvents();
+    } else if (!this.analyticsTimer) {
+      this.scheduleFlush(ANALYTICS_FLUSH_MS);
+    }
+    return { success: true, queued: true };
+  }
+
+  // Drop the oldest events rather than grow without bound while the API is unreachable
+  trimAnalyticsQueue() {
+    if (this.analyticsQueue.length > ANALYTICS_MAX_QUEUE) {
+      this.analyticsQueue.splice(0, this.analyticsQueue.length - ANALYTICS_MAX_QUEUE);
+    }
+  }
+
+  analyticsBackingOff() {
+    return Date.now() < this.analyticsRetryAt;
+  }
+
+  scheduleFlush(delay) {
+    clearTimeout(this.analyticsTimer);
+    // Never fire before a pending backoff ends
+    const wait = Math.max(delay, this.analyticsRetryAt - Date.now());
+    this.analyticsTimer = setTimeout(() => this.flushEvents(), wait);
+  }
+
+  async flushEvents({ keepalive = false } = {}) {
+    clearTimeout(this.analyticsTimer);
+    this.analyticsTimer = null;
+    if (this.analyticsFlushing || this.analyticsQueue.length === 0) return;
+    if (this.analyticsBackingOff()) {
+      this.scheduleFlush(0);
+      return;
+    }
+
+    const batch = this.analyticsQueue.splice(0, ANALYTICS_BATCH_SIZE);
+    this.analyticsFlushing = true;
     try {
-      const response = await this.client.post('/analytics/track', eventData);
-      return response.data;
+      if (keepalive) {
+        // The page is going away: fetch with keepalive outlives it (axios cannot)
+        const token = localStorage.getItem('authToken');
+        const response = await fetch(`${API_BASE_URL}/analytics/track/batch`, {
+          method: 'POST',
+          keepalive: true,
+          headers: {
+            'Content-Type': 'application/json',
+            ...(token ? { Authorization: `Bearer ${token}` } : {}),
+          },
+          body: JSON.stringify({ events: batch }),
+        });
+        // fetch only rejects on network errors; fail on HTTP errors the way axios does
+        if (!response.ok) {
+          const error = new Error(`Analytics batch failed with status ${response.status}`);
+          error.response = {
+            status: response.status,
+            headers: { 'retry-after': response.headers.get('Retry-After') },
+          };
+          throw error;
+        }
+      } else {
+        await this.client.post('/analytics/track/batch', { events: batch });
+      }
+      this.analyticsFailures = 0;
     } catch (error) {
-      console.error('Error tracking event:', error);
-      return null;
+      const status = error.response?.status;
+      if (!status || status === 429 || status >= 500) {
+        // Retry later; event IDs make the resend safe
+        this.analyticsQueue.unshift(...batch);
+        this.trimAnalyticsQueue();
+        this.analyticsFailures += 1;
+        const backoff = Math.min(
+          ANALYTICS_RETRY_MAX_MS,
+          ANALYTICS_RETRY_BASE_MS * 2 ** (this.analyticsFailures - 1),
+        );
+        const delay = retryAfterMs(error.response?.headers?.['retry-after']) ?? Math.random() * backoff;
+        this.analyticsRetryAt = Date.now() + Math.min(delay, ANALYTICS_RETRY_MAX_MS);
+      } else {
+        console.error('Error tracking events:', error);
+      }
+    } finally {
+      this.analyticsFlushing = false;
+    }
+
+    // Further batches go out from the timer rather than by recursing
+    if (this.analyticsQueue.length) {
+      this.scheduleFlush(this.analyticsQueue.length >= ANALYTICS_BATCH_SIZE ? 0 : ANALYTICS_FLUSH_MS);
     }
   }
 }